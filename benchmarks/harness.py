@@ -0,0 +1,182 @@
+import argparse
+import csv
+import gc
+import json
+import sys
+from collections import namedtuple
+from statistics import median, quantiles
+from time import perf_counter_ns
+
+"""
+A small benchmark harness.
+
+A Case has a setup and a run: setup(size) builds the input and returns
+a tuple of arguments; only run(*args) is timed. setup is called again
+before every repetition, so in-place algorithms always get fresh input
+and random input generation never lands in the timed region.
+Each case is warmed up, then timed `repeats` times with
+perf_counter_ns (garbage collector off, as timeit does),
+and reported as median and interquartile range.
+
+Results can be written as JSON or CSV, and compared against a stored
+JSON baseline: a case is flagged as a regression when its median is more
+than `tolerance` slower than the baseline's *and* its IQR sits entirely
+above the baseline's, so one noisy run doesn't raise an alarm.
+"""
+
+# max_size=None: no limit
+Case = namedtuple('Case', 'group name setup run max_size', defaults=(None,))
+
+FIELDS = ['group', 'name', 'size', 'repeats',
+          'median_ns', 'q1_ns', 'q3_ns', 'iqr_ns']
+
+
+def measure(case, size, warmup=1, repeats=7):
+    """Time one case at one size; returns a result dict"""
+    for i in range(warmup):
+        case.run(*case.setup(size))
+    times = []
+    gc_was_enabled = gc.isenabled()
+    try:
+        for i in range(repeats):
+            args = case.setup(size)
+            gc.collect()
+            gc.disable()
+            start = perf_counter_ns()
+            case.run(*args)
+            end = perf_counter_ns()
+            times.append(end - start)
+            if gc_was_enabled:
+                gc.enable()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if len(times) > 1:
+        q1, q2, q3 = quantiles(times, n=4, method='inclusive')
+    else:
+        q1 = q2 = q3 = times[0]
+    return {'group': case.group, 'name': case.name, 'size': size,
+            'repeats': repeats, 'median_ns': median(times),
+            'q1_ns': q1, 'q3_ns': q3, 'iqr_ns': q3 - q1}
+
+
+def run_cases(cases, sizes, warmup=1, repeats=7, out=None):
+    """Measure every case at every size it accepts,
+    printing a line per result to out as it goes
+    """
+    results = []
+    for case in cases:
+        for size in sizes:
+            if case.max_size is not None and size > case.max_size:
+                continue
+            result = measure(case, size, warmup, repeats)
+            results.append(result)
+            if out is not None:
+                print(format_result(result), file=out, flush=True)
+    return results
+
+
+def format_result(result):
+    return (f"{result['group'] + '/' + result['name']:<50} "
+            f"n={result['size']:<8} "
+            f"median {result['median_ns'] / 1e6:>11.3f} ms  "
+            f"IQR {result['iqr_ns'] / 1e6:>9.3f} ms")
+
+
+def write_json(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1)
+    return None
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_csv(results, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    return None
+
+
+def compare(results, baseline, tolerance=0.10):
+    """(result, baseline result, ratio of medians) for every regression"""
+    base = {(b['group'], b['name'], b['size']): b for b in baseline}
+    regressions = []
+    for r in results:
+        b = base.get((r['group'], r['name'], r['size']))
+        if b is None:
+            continue
+        ratio = r['median_ns'] / b['median_ns']
+        if ratio > 1 + tolerance and r['q1_ns'] > b['q3_ns']:
+            regressions.append((r, b, ratio))
+    return regressions
+
+
+def plot(results, path):
+    """Median time against size, one line per case and one panel per group,
+    saved to path (nothing blocks on a window)
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    groups = sorted({r['group'] for r in results})
+    fig, axes = plt.subplots(len(groups), 1, squeeze=False,
+                             figsize=(7, 4 * len(groups)))
+    for ax, group in zip(axes[:, 0], groups):
+        names = sorted({r['name'] for r in results if r['group'] == group})
+        for name in names:
+            rs = sorted((r for r in results
+                         if r['group'] == group and r['name'] == name),
+                        key=lambda r: r['size'])
+            ax.errorbar([r['size'] for r in rs],
+                        [r['median_ns'] / 1e6 for r in rs],
+                        yerr=[[(r['median_ns'] - r['q1_ns']) / 1e6 for r in rs],
+                              [(r['q3_ns'] - r['median_ns']) / 1e6 for r in rs]],
+                        label=name, marker='o')
+        ax.set_title(group)
+        ax.set_xlabel('size')
+        ax.set_ylabel('median time (ms)')
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.legend(fontsize='small')
+    fig.tight_layout()
+    fig.savefig(path)
+    return None
+
+
+def main(cases, argv=None):
+    parser = argparse.ArgumentParser(description="Run benchmarks")
+    parser.add_argument('--filter', default='',
+                        help="only cases whose group/name contains this")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--json', help="write results to this JSON file")
+    parser.add_argument('--csv', help="write results to this CSV file")
+    parser.add_argument('--plot', help="save a plot of the results here")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    cases = [c for c in cases if args.filter in c.group + '/' + c.name]
+    results = run_cases(cases, args.sizes, args.warmup, args.repeats,
+                        out=sys.stdout)
+    if args.json:
+        write_json(results, args.json)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.plot:
+        plot(results, args.plot)
+    if args.baseline:
+        regressions = compare(results, load_json(args.baseline),
+                              args.tolerance)
+        for r, b, ratio in regressions:
+            print(f"REGRESSION {r['group']}/{r['name']} n={r['size']}: "
+                  f"{ratio:.2f}x slower than baseline")
+        if regressions:
+            return 1
+    return 0
@@ -0,0 +1,298 @@
+import os
+import random
+import sys
+from math import isqrt
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ('union_find', 'sorts', 'priority_queues', 'stacks_and_queues'):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+import union_find  # noqa: E402
+import percolation_monte_carlo  # noqa: E402
+import elementary_sorts  # noqa: E402
+import mergesort  # noqa: E402
+import quicksort  # noqa: E402
+import hybrid  # noqa: E402
+import parallel_sort  # noqa: E402
+from MinPQ import MinPQ  # noqa: E402
+from MaxPQ_heapsort import MaxPQ  # noqa: E402
+from heaps import HEAPS  # noqa: E402
+from linked_list import LinkedStack, ArrayStack, LinkedQueue  # noqa: E402
+from deque import MyDeque, RandomizedQueue  # noqa: E402
+from harness import Case, main  # noqa: E402
+
+"""
+Benchmark cases for every data structure in the repo.
+
+    python benchmarks/suites.py --sizes 1000 10000 --json now.json
+    python benchmarks/suites.py --filter sorts/ --baseline now.json
+
+Inputs come from a Random seeded with the size, so every run of a case
+sees the same data. For the percolation cases, size is the number of
+sites (the grid is isqrt(size) on a side).
+
+What the old union_find/timing.py plots taught us still holds:
+big O time isn't everything. For the Monte Carlo simulations the
+"virtual top" and "virtual bottom" stay their own roots until the very
+end, so find stays cheap even for plain QuickUnion; the balancing and
+compressing of the weighted variants isn't needed there, and its cost
+can make them slightly slower for this application. That only works
+because of the chirality of QuickUnion.union: root the other way round
+and the savings disappear.
+"""
+
+UF_CLASSES = [
+    union_find.QuickFindUF,
+    union_find.QuickUnionUF,
+    union_find.WeightedQuickUnionUF,
+    union_find.WeightedQuickUnionPathCompressionUF,
+    union_find.WeightedQuickUnionPathHalvingUF,
+    union_find.WeightedQuickUnionPathSplittingUF,
+    union_find.RankedQuickUnionPathHalvingUF,
+    union_find.ArrayWeightedQuickUnionPathCompressionUF,
+]
+
+QUADRATIC = 5000  # largest size for O(n^2) cases
+
+
+def random_pairs(size):
+    rng = random.Random(size)
+    return [(rng.randrange(size), rng.randrange(size)) for i in range(size)]
+
+
+def random_ints(size):
+    rng = random.Random(size)
+    return [rng.randrange(size) for i in range(size)]
+
+
+def union_find_cases():
+    def setup(uf_class):
+        def make(size):
+            return (uf_class(size), random_pairs(size), random_pairs(size))
+        return make
+
+    def run(uf, unions, finds):
+        for n1, n2 in unions:
+            uf.union(n1, n2)
+        for n1, n2 in finds:
+            uf.find(n1, n2)
+
+    def setup_many(size):
+        uf = union_find.ArrayWeightedQuickUnionPathCompressionUF(size)
+        return (uf, np.array(random_pairs(size)), np.array(random_pairs(size)))
+
+    def run_many(uf, unions, finds):
+        uf.union_many(unions)
+        uf.connected_many(finds)
+
+    cases = []
+    for uf_class in UF_CLASSES:
+        quadratic = uf_class in (union_find.QuickFindUF,
+                                 union_find.QuickUnionUF)
+        cases.append(Case('union_find', f'{uf_class.__name__} random edges',
+                          setup(uf_class), run,
+                          QUADRATIC if quadratic else None))
+    cases.append(Case('union_find',
+                      'ArrayWeightedQuickUnionPathCompressionUF batched',
+                      setup_many, run_many))
+    return cases
+
+
+def percolation_cases():
+    def setup(uf_class):
+        def make(size):
+            n = isqrt(size)
+            order = list(range(n ** 2))
+            random.Random(size).shuffle(order)
+            return (percolation_monte_carlo.Percolation(n, uf_class), order)
+        return make
+
+    def run_threshold(percolation, order):
+        while not percolation.percolates():
+            percolation.open(order.pop())
+
+    def run_open_all(percolation, order):
+        for idx in order:
+            percolation.open(idx)
+
+    def setup_bulk(size):
+        n = isqrt(size)
+        return (n, np.random.default_rng(size).permutation(n ** 2))
+
+    cases = []
+    for uf_class in UF_CLASSES:
+        cases.append(Case('percolation', f'{uf_class.__name__} threshold',
+                          setup(uf_class), run_threshold,
+                          QUADRATIC if uf_class is union_find.QuickFindUF
+                          else None))
+    for uf_class in UF_CLASSES:
+        # per-site cost of Percolation.open (timing.py's open_site_timer)
+        cases.append(Case('percolation',
+                          f'{uf_class.__name__} open every site',
+                          setup(uf_class), run_open_all,
+                          QUADRATIC if uf_class is union_find.QuickFindUF
+                          else None))
+    cases.append(Case('percolation', 'bulk percolation_step',
+                      setup_bulk, percolation_monte_carlo.percolation_step))
+    return cases
+
+
+def nearly_sorted_ints(size):
+    """Sorted, then 1% of the items swapped with random others"""
+    rng = random.Random(size)
+    a = list(range(size))
+    for k in range(size // 100):
+        i = rng.randrange(size)
+        j = rng.randrange(size)
+        a[i], a[j] = a[j], a[i]
+    return a
+
+
+def sort_cases():
+    def setup(size):
+        return (random_ints(size),)
+
+    def setup_nearly_sorted(size):
+        return (nearly_sorted_ints(size),)
+
+    sorts = [
+        ('selection_sort', elementary_sorts.selection_sort, QUADRATIC),
+        ('insertion_sort', elementary_sorts.insertion_sort, QUADRATIC),
+        ('shell_sort', elementary_sorts.shell_sort, None),
+        ('mergesort', mergesort.mergesort, None),
+        ('bottom_up_mergesort', mergesort.bottom_up_mergesort, None),
+        ('quicksort', quicksort.quicksort, None),
+        ('three_way_quicksort', quicksort.three_way_quicksort, None),
+        ('MaxPQ.heapsort', MaxPQ.heapsort, None),
+        ('natural_mergesort', hybrid.natural_mergesort, None),
+        ('introsort', hybrid.introsort, None),
+    ]
+    cases = [Case('sorts', name, setup, func, max_size)
+             for name, func, max_size in sorts]
+    cases += [Case('sorts', name + ' nearly sorted', setup_nearly_sorted,
+                   func, max_size)
+              for name, func, max_size in sorts
+              if name != 'selection_sort']
+
+    def setup_numeric(size):
+        return (np.array(random_ints(size), dtype=np.int64),)
+
+    cases += [Case('sorts', name + ' int64 array', setup_numeric, func)
+              for name, func in [('mergesort', mergesort.mergesort),
+                                 ('quicksort', quicksort.quicksort),
+                                 ('parallel_sort',
+                                  parallel_sort.parallel_sort),
+                                 ('numpy sort', np.sort)]]
+    return cases
+
+
+def priority_queue_cases():
+    def setup(pq_class):
+        def make(size):
+            return (pq_class(), random_ints(size))
+        return make
+
+    def run_min(pq, items):
+        for item in items:
+            pq.insert(item)
+        while not pq.is_empty():
+            pq.del_min()
+
+    def run_max(pq, items):
+        for item in items:
+            pq.insert(item)
+        while not pq.is_empty():
+            pq.del_max()
+
+    return [Case('priority_queues', 'MinPQ insert/del_min',
+                 setup(MinPQ), run_min),
+            Case('priority_queues', 'MaxPQ insert/del_max',
+                 setup(MaxPQ), run_max)]
+
+
+def heap_cases():
+    """The MinPQ backends in heaps.py, side by side. The monotone case is
+    shaped like A*: small integer priorities that never drop below the
+    last minimum, two inserts for every del_min
+    """
+    def setup(pq_class):
+        def make(size):
+            return (pq_class(), random_ints(size))
+        return make
+
+    def setup_monotone(pq_class):
+        def make(size):
+            rng = random.Random(size)
+            return (pq_class(), [rng.randrange(8) for i in range(size)])
+        return make
+
+    def run(pq, items):
+        for item in items:
+            pq.insert(item)
+        while not pq.is_empty():
+            pq.del_min()
+
+    def run_monotone(pq, steps):
+        last = 0
+        for i, step in enumerate(steps):
+            pq.insert(last + step)
+            if i % 2:
+                last = pq.del_min()
+        while not pq.is_empty():
+            pq.del_min()
+
+    cases = []
+    for name, pq_class in HEAPS.items():
+        cases.append(Case('heaps', f'{name} insert/del_min',
+                          setup(pq_class), run))
+        cases.append(Case('heaps', f'{name} monotone small priorities',
+                          setup_monotone(pq_class), run_monotone))
+    return cases
+
+
+def stack_and_queue_cases():
+    def setup(container_class):
+        def make(size):
+            return (container_class(), random_ints(size))
+        return make
+
+    def run_stack(stack, items):
+        for item in items:
+            stack.push(item)
+        while not stack.is_empty():
+            stack.pop()
+
+    def run_queue(queue, items):
+        for item in items:
+            queue.enqueue(item)
+        while not queue.is_empty():
+            queue.dequeue()
+
+    def run_deque(deque, items):
+        for item in items:
+            deque.add_first(item)
+        while not deque.is_empty():
+            deque.remove_last()
+
+    return [Case('stacks_and_queues', 'LinkedStack push/pop',
+                 setup(LinkedStack), run_stack),
+            Case('stacks_and_queues', 'ArrayStack push/pop',
+                 setup(ArrayStack), run_stack),
+            Case('stacks_and_queues', 'LinkedQueue enqueue/dequeue',
+                 setup(LinkedQueue), run_queue),
+            Case('stacks_and_queues', 'RandomizedQueue enqueue/dequeue',
+                 setup(RandomizedQueue), run_queue),
+            Case('stacks_and_queues', 'MyDeque add_first/remove_last',
+                 setup(MyDeque), run_deque)]
+
+
+def all_cases():
+    return (union_find_cases() + percolation_cases() + sort_cases()
+            + priority_queue_cases() + heap_cases()
+            + stack_and_queue_cases())
+
+
+if __name__ == "__main__":
+    sys.exit(main(all_cases()))
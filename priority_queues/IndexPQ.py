@@ -0,0 +1,139 @@
+"""
+Indexed priority queues: every item is inserted under a handle (any
+hashable, e.g. a board or a vertex), and can later be found, re-keyed or
+deleted by that handle in O(log n), instead of being pushed again with
+a new key and leaving a stale copy behind. The heap never holds more
+entries than there are live handles.
+
+pq     1-indexed binary heap of handles
+qp     handle -> position in pq (the inverse of pq)
+keys   handle -> key
+
+_IndexPQ holds everything but the order; IndexMinPQ (min, min_handle,
+del_min) and IndexMaxPQ (max, max_handle, del_max) each supply _before.
+"""
+
+
+class _IndexPQ():
+    def __init__(self):
+        self.pq = [None]
+        self.qp = {}
+        self.keys = {}
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def is_empty(self):
+        return self.n == 0
+
+    def contains(self, handle):
+        return handle in self.qp
+
+    def __contains__(self, handle):
+        return handle in self.qp
+
+    def key_of(self, handle):
+        return self.keys[handle]
+
+    def insert(self, handle, key):
+        if handle in self.qp:
+            raise ValueError(f"{handle!r} is already in the queue")
+        self.n += 1
+        self.pq.append(handle)
+        self.qp[handle] = self.n
+        self.keys[handle] = key
+        self._swim(self.n)
+        return None
+
+    def top_handle(self):
+        if self.n == 0:
+            raise IndexError("queue is empty")
+        return self.pq[1]
+
+    def top_key(self):
+        return self.keys[self.top_handle()]
+
+    def del_top(self):
+        """Remove the top item; returns its handle"""
+        handle = self.top_handle()
+        self._remove_at(1)
+        return handle
+
+    def change_key(self, handle, key):
+        i = self.qp[handle]
+        self.keys[handle] = key
+        self._swim(i)
+        self._sink(self.qp[handle])
+        return None
+
+    def decrease_key(self, handle, key):
+        if not key < self.keys[handle]:
+            raise ValueError("decrease_key would not decrease the key")
+        self.change_key(handle, key)
+        return None
+
+    def increase_key(self, handle, key):
+        if not self.keys[handle] < key:
+            raise ValueError("increase_key would not increase the key")
+        self.change_key(handle, key)
+        return None
+
+    def delete(self, handle):
+        self._remove_at(self.qp[handle])
+        return None
+
+    def _remove_at(self, i):
+        handle = self.pq[i]
+        self._exch(i, self.n)
+        self.pq.pop()
+        self.n -= 1
+        del self.qp[handle]
+        del self.keys[handle]
+        if i <= self.n:
+            self._swim(i)
+            self._sink(i)
+        return None
+
+    def _swim(self, k):
+        while k > 1 and self._before(k, k // 2):
+            self._exch(k, k // 2)
+            k = k // 2
+        return None
+
+    def _sink(self, k):
+        while 2 * k <= self.n:
+            j = 2 * k
+            if j < self.n and self._before(j + 1, j):
+                j += 1
+            if not self._before(j, k):
+                break
+            self._exch(k, j)
+            k = j
+        return None
+
+    def _exch(self, i, j):
+        pq = self.pq
+        pq[i], pq[j] = pq[j], pq[i]
+        self.qp[pq[i]] = i
+        self.qp[pq[j]] = j
+        return None
+
+
+class IndexMinPQ(_IndexPQ):
+    min = _IndexPQ.top_key
+    min_handle = _IndexPQ.top_handle
+    del_min = _IndexPQ.del_top
+
+    def _before(self, i, j):
+        """Should the handle at position i sit above the one at j?"""
+        return self.keys[self.pq[i]] < self.keys[self.pq[j]]
+
+
+class IndexMaxPQ(_IndexPQ):
+    max = _IndexPQ.top_key
+    max_handle = _IndexPQ.top_handle
+    del_max = _IndexPQ.del_top
+
+    def _before(self, i, j):
+        return self.keys[self.pq[j]] < self.keys[self.pq[i]]
@@ -1,12 +1,25 @@
 from typing import MutableSequence, Hashable
 
 
+MIN_CAPACITY = 8  # resizing as in MinPQ
+
+
 class MaxPQ():
     def __init__(self):
         self.a = [None]
         self.n = 0
         self.size = 0
 
+    @classmethod
+    def from_iterable(cls, items):
+        """A queue holding items, heap-ordered bottom-up in O(n)"""
+        pq = cls()
+        pq.a.extend(items)
+        pq.n = pq.size = len(pq.a) - 1
+        for k in range(pq.n // 2, 0, -1):
+            pq._sink(k)
+        return pq
+
     def insert(self, item):
         if self.n == self.size:
             self._resize(max(1, self.n) * 2)
@@ -20,8 +33,24 @@ class MaxPQ():
         self._exch(1, self.n)
         self.a[self.n] = None  # prevent loitering
         self.n -= 1
-        if (self.n * 4) == self.size:
-            self._resize(self.n * 2)
+        if self.size > MIN_CAPACITY and self.n * 4 < self.size:
+            self._resize(self.size // 2)
+        self._sink(1)
+        return max_val
+
+    def pushpop(self, item):
+        """insert(item), then del_max(), in one sink (or none at all)"""
+        if self.n == 0 or not item < self.a[1]:
+            return item
+        max_val = self.a[1]
+        self.a[1] = item
+        self._sink(1)
+        return max_val
+
+    def replace(self, item):
+        """del_max(), then insert(item), in one sink"""
+        max_val = self.max()
+        self.a[1] = item
         self._sink(1)
         return max_val
 
@@ -66,23 +95,27 @@ class MaxPQ():
         return None
 
     def _resize(self, capacity):
-        copy = [None] * (1 + capacity)
-        for i in range(1, self.n + 1):
-            copy[i] = self.a[i]
-        self.a = copy
+        self.a = self.a[:(self.n + 1)] + [None] * (capacity - self.n)
         self.size = capacity
         return None
 
     @staticmethod
-    def heapsort(lst: MutableSequence[Hashable]) -> MutableSequence[Hashable]:
+    def heapsort(lst: MutableSequence[Hashable], key=None,
+                 reverse=False) -> MutableSequence[Hashable]:
+        if key is not None or reverse:
+            #  sort (key, index) pairs, computing each key once;
+            #  the unique index keeps ties in input order
+            sign = -1 if reverse else 1
+            keys = lst if key is None else map(key, lst)
+            decorated = MaxPQ.heapsort(
+                [(k, sign * i) for i, k in enumerate(keys)])
+            if reverse:
+                decorated.reverse()
+            return [lst[sign * i] for k, i in decorated]
         #  build heap using bottom-up method
         #  to save space, perform in place
         #  (would need to write separate class for this)
-        a = MaxPQ()
-        a.a.extend(lst)
-        a.n = len(lst)
-        for k in range(a.n // 2, 0, -1):
-            a._sink(k)
+        a = MaxPQ.from_iterable(lst)
         #  sortdown: remove max one at a time, leaving in array
         for i in range(a.n, 1, -1):
             a._exch(1, i)
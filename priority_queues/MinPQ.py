@@ -1,9 +1,29 @@
+"""
+Resizing: the array doubles when full, and halves only once it is less
+than a quarter full (and bigger than MIN_CAPACITY), so right after any
+resize it is half full and alternating inserts and deletes can't make it
+shrink and regrow over and over.
+"""
+
+MIN_CAPACITY = 8
+
+
 class MinPQ():
     def __init__(self):
         self.a = [None]
         self.n = 0
         self.size = 0
 
+    @classmethod
+    def from_iterable(cls, items):
+        """A queue holding items, heap-ordered bottom-up in O(n)"""
+        pq = cls()
+        pq.a.extend(items)
+        pq.n = pq.size = len(pq.a) - 1
+        for k in range(pq.n // 2, 0, -1):
+            pq._sink(k)
+        return pq
+
     def insert(self, item):
         if self.n == self.size:
             self._resize(max(1, self.n) * 2)
@@ -17,8 +37,24 @@ class MinPQ():
         self._exch(1, self.n)
         self.a[self.n] = None  # prevent loitering
         self.n -= 1
-        if (self.n * 4) == self.size:
-            self._resize(self.n * 2)
+        if self.size > MIN_CAPACITY and self.n * 4 < self.size:
+            self._resize(self.size // 2)
+        self._sink(1)
+        return min_val
+
+    def pushpop(self, item):
+        """insert(item), then del_min(), in one sink (or none at all)"""
+        if self.n == 0 or not item > self.a[1]:
+            return item
+        min_val = self.a[1]
+        self.a[1] = item
+        self._sink(1)
+        return min_val
+
+    def replace(self, item):
+        """del_min(), then insert(item), in one sink"""
+        min_val = self.min()
+        self.a[1] = item
         self._sink(1)
         return min_val
 
@@ -63,9 +99,6 @@ class MinPQ():
         return None
 
     def _resize(self, capacity):
-        copy = [None] * (1 + capacity)
-        for i in range(1, self.n + 1):
-            copy[i] = self.a[i]
-        self.a = copy
+        self.a = self.a[:(self.n + 1)] + [None] * (capacity - self.n)
         self.size = capacity
         return None
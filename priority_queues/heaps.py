@@ -0,0 +1,285 @@
+from MinPQ import MinPQ
+
+"""
+Other min-heaps behind MinPQ's interface (insert, del_min, min, is_empty,
+pushpop, replace and the from_iterable constructor), so any of them can
+stand in for MinPQ, as in multiway.merge; HEAPS maps a name to each class.
+
+DaryMinPQ     implicit d-ary heap (d = 4 by default) in a 0-indexed
+              list. Half the depth of a binary heap, so del_min takes
+              fewer levels, and the d children of a node sit next to each
+              other. Compares are inlined and sift moves a hole down
+              (or up) instead of swapping at every level.
+PairingMinPQ  pairing heap: insert and meld are O(1) (link the new tree
+              under the root, or the root under it); del_min is
+              O(log n) amortized, pairing the root's children left to
+              right, then linking the pairs right to left.
+RadixMinPQ    monotone radix heap for integer priorities, as A* f-scores
+              and Dijkstra distances are: every priority inserted must be
+              at least the last one removed. Bucket i holds the items whose
+              priority first differs from the last minimum at bit i - 1,
+              so insert is O(1), and del_min only redistributes one bucket
+              when bucket 0 runs dry, each item moving down at most
+              log(C) times, C the spread of live priorities.
+"""
+
+
+class DaryMinPQ():
+    def __init__(self, d=4):
+        self.a = []
+        self.d = d
+
+    @classmethod
+    def from_iterable(cls, items, d=4):
+        """A queue holding items, heap-ordered bottom-up in O(n)"""
+        pq = cls(d)
+        pq.a.extend(items)
+        for k in range((len(pq.a) - 2) // d, -1, -1):
+            pq._sink(pq.a[k], k)
+        return pq
+
+    def __len__(self):
+        return len(self.a)
+
+    def insert(self, item):
+        a = self.a
+        d = self.d
+        a.append(item)
+        k = len(a) - 1
+        while k > 0:
+            parent = (k - 1) // d
+            if not item < a[parent]:
+                break
+            a[k] = a[parent]
+            k = parent
+        a[k] = item
+        return None
+
+    def del_min(self):
+        a = self.a
+        min_val = self.min()
+        last = a.pop()  # shrinks with the list; nothing loiters
+        if a:
+            self._sink(last)
+        return min_val
+
+    def pushpop(self, item):
+        """insert(item), then del_min(), in one sink (or none at all)"""
+        if not self.a or not self.a[0] < item:
+            return item
+        min_val = self.a[0]
+        self._sink(item)
+        return min_val
+
+    def replace(self, item):
+        """del_min(), then insert(item), in one sink"""
+        min_val = self.min()
+        self._sink(item)
+        return min_val
+
+    def min(self):
+        if self.a:
+            return self.a[0]
+        else:
+            raise IndexError("queue is empty")
+
+    def is_empty(self):
+        return not self.a
+
+    def _sink(self, item, k=0):
+        """Move item down from position k (the root) into its place"""
+        a = self.a
+        d = self.d
+        n = len(a)
+        while True:
+            first = d * k + 1
+            if first >= n:
+                break
+            j = first
+            for c in range(first + 1, min(first + d, n)):
+                if a[c] < a[j]:
+                    j = c
+            if not a[j] < item:
+                break
+            a[k] = a[j]
+            k = j
+        a[k] = item
+        return None
+
+
+class PairingMinPQ():
+    class Node():
+        __slots__ = ('item', 'child', 'sibling')
+
+        def __init__(self, item):
+            self.item = item
+            self.child = None
+            self.sibling = None
+
+    def __init__(self):
+        self.root = None
+        self.n = 0
+
+    @classmethod
+    def from_iterable(cls, items):
+        """A queue holding items; O(n), as every insert is O(1)"""
+        pq = cls()
+        for item in items:
+            pq.insert(item)
+        return pq
+
+    def __len__(self):
+        return self.n
+
+    def insert(self, item):
+        self.root = self._link(self.root, self.Node(item))
+        self.n += 1
+        return None
+
+    def meld(self, other):
+        """Move every item of other (another PairingMinPQ) into this one"""
+        self.root = self._link(self.root, other.root)
+        self.n += other.n
+        other.root = None
+        other.n = 0
+        return None
+
+    def del_min(self):
+        min_val = self.min()
+        # first pass: link the children in pairs, left to right
+        pairs = []
+        node = self.root.child
+        while node is not None:
+            second = node.sibling
+            if second is None:
+                node.sibling = None
+                pairs.append(node)
+                break
+            rest = second.sibling
+            node.sibling = second.sibling = None
+            pairs.append(self._link(node, second))
+            node = rest
+        # second pass: link the pairs into one tree, right to left
+        root = None
+        for tree in reversed(pairs):
+            root = self._link(tree, root)
+        self.root = root
+        self.n -= 1
+        return min_val
+
+    def pushpop(self, item):
+        """insert(item), then del_min()"""
+        if self.root is None or not self.root.item < item:
+            return item
+        min_val = self.del_min()
+        self.insert(item)
+        return min_val
+
+    def replace(self, item):
+        """del_min(), then insert(item)"""
+        min_val = self.del_min()
+        self.insert(item)
+        return min_val
+
+    def min(self):
+        if self.root is not None:
+            return self.root.item
+        else:
+            raise IndexError("queue is empty")
+
+    def is_empty(self):
+        return self.root is None
+
+    @staticmethod
+    def _link(a, b):
+        """Root of the tree made by hanging the larger root under the other"""
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if b.item < a.item:
+            a, b = b, a
+        b.sibling = a.child
+        a.child = b
+        return a
+
+
+class RadixMinPQ():
+    """key(item) gives an item's non-negative integer priority (default:
+    the item); items of equal priority come out in no particular order
+    """
+    def __init__(self, key=None):
+        self.key = key
+        self.buckets = [[]]
+        self.last = 0
+        self.n = 0
+
+    @classmethod
+    def from_iterable(cls, items, key=None):
+        """A queue holding items; O(n), as every insert is O(1)"""
+        pq = cls(key)
+        for item in items:
+            pq.insert(item)
+        return pq
+
+    def __len__(self):
+        return self.n
+
+    def insert(self, item):
+        p = item if self.key is None else self.key(item)
+        if p < self.last:
+            raise ValueError(f"priority {p} is below the last minimum "
+                             f"{self.last}")
+        i = (p ^ self.last).bit_length()
+        while i >= len(self.buckets):
+            self.buckets.append([])
+        self.buckets[i].append((p, item))
+        self.n += 1
+        return None
+
+    def del_min(self):
+        min_val = self.min()
+        self.buckets[0].pop()
+        self.n -= 1
+        return min_val
+
+    def pushpop(self, item):
+        """insert(item), then del_min(); both are cheap here already"""
+        self.insert(item)
+        return self.del_min()
+
+    def replace(self, item):
+        """del_min(), then insert(item): item's priority must be at least
+        the one removed
+        """
+        min_val = self.del_min()
+        self.insert(item)
+        return min_val
+
+    def min(self):
+        buckets = self.buckets
+        if not buckets[0]:
+            if self.n == 0:
+                raise IndexError("queue is empty")
+            i = 1
+            while not buckets[i]:
+                i += 1
+            spill = buckets[i]
+            buckets[i] = []
+            last = min(entry[0] for entry in spill)
+            self.last = last
+            # every item in bucket i now differs from last below bit i - 1
+            for entry in spill:
+                buckets[(entry[0] ^ last).bit_length()].append(entry)
+        return buckets[0][-1][1]
+
+    def is_empty(self):
+        return self.n == 0
+
+
+HEAPS = {
+    'binary': MinPQ,
+    '4-ary': DaryMinPQ,
+    'pairing': PairingMinPQ,
+    'radix': RadixMinPQ,
+}
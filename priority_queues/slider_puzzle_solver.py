@@ -1,6 +1,7 @@
-from functools import total_ordering
+from collections import OrderedDict
+from functools import cache, total_ordering
 
-from MinPQ import MinPQ
+from IndexPQ import IndexMinPQ
 
 """
 Write a program to solve the 8-puzzle problem
@@ -9,30 +10,55 @@ Write a program to solve the 8-puzzle problem
 
 
 class Board():
+    """Tiles are packed into one int, bits (at least 4) per tile, with the
+    tile at position pos in bits pos * bits and up; the blank's position
+    and the manhattan distance are cached. A move is a few integer ops:
+    the tile next to the blank moves into it, and the distance changes by
+    that tile's change in distance to its goal square
+    """
+    __slots__ = ('tiles', 'dimension', 'blank', 'manhattan', '_bits')
+
     def __init__(self, array):
         """constructor takes an
         n x n list of lists containing
         the n ** 2 integers between 0 and n ** 2 - 1,
         where 0 represents the blank square
         """
-        self.flat = [tile for row in array for tile in row]
         self.dimension = len(array)
+        self.flat = [tile for row in array for tile in row]
+
+    @property
+    def flat(self):
+        mask = (1 << self._bits) - 1
+        return [(self.tiles >> (pos * self._bits)) & mask
+                for pos in range(self.dimension ** 2)]
+
+    @flat.setter
+    def flat(self, flat):
+        self._bits = _bits(self.dimension)
+        self.tiles = _pack(flat, self._bits)
+        self.blank = flat.index(0) if flat else None
+        distances = _distances(self.dimension)
+        self.manhattan = sum(distances[tile][pos]
+                             for pos, tile in enumerate(flat) if tile != 0)
 
     def __repr__(self):
+        flat = self.flat
         output = "\n" + str(self.dimension)
-        for n in range(len(self.flat)):
+        for n in range(len(flat)):
             if n % (self.dimension) == 0:
-                output += "\n" + str(self.flat[n])
+                output += "\n" + str(flat[n])
             else:
-                output += " " + str(self.flat[n])
+                output += " " + str(flat[n])
         return output
 
     def hamming_distance(self):
         """Number of tiles out of place
         """
         distance = 0
-        for pos in range(1, len(self.flat)):
-            if pos != self.flat[pos - 1]:
+        flat = self.flat
+        for pos in range(1, len(flat)):
+            if pos != flat[pos - 1]:
                 distance += 1
         return distance
 
@@ -40,56 +66,35 @@ class Board():
         """Sum of manhattan distances
         between self and goal
         """
-        distance = 0
-        for pos in range(1, len(self.flat) + 1):
-            tile = self.flat[pos - 1]
-            actual = ((pos - 1) // self.dimension,
-                      (pos - 1) % self.dimension)
-            goal = ((tile - 1) // self.dimension,
-                    (tile - 1) % self.dimension)
-            if tile != 0:
-                distance += abs(goal[0] - actual[0]) + abs(goal[1] - actual[1])
-        return distance
+        return self.manhattan
 
     def neighbors(self):
-        for board in self._neighbor_boards():
-            neighbor = Board([])
-            neighbor.dimension = self.dimension
-            neighbor.flat = board
-            yield neighbor
-
-    def _neighbor_boards(self):
-        for k in range(0, len(self.flat)):
-            if self.flat[k] == 0:
-                pos_0 = k
-                coords = ((k // self.dimension), (k % self.dimension))
-                break
-        neighbor_boards = []
-        # horizontal neighbors
-        if coords[1] == 0:
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 + 1))
-        elif coords[1] == self.dimension - 1:
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 - 1))
-        else:
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 - 1))
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 + 1))
-        # vertical neighbors
-        if coords[0] == 0:
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 + self.dimension))
-        elif coords[0] == self.dimension - 1:
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 - self.dimension))
-        else:
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 + self.dimension))
-            neighbor_boards.append(self._exch(self.flat.copy(),
-                                              pos_0, pos_0 - self.dimension))
-        return neighbor_boards
+        dimension = self.dimension
+        row, col = divmod(self.blank, dimension)
+        # horizontal neighbors, then vertical, as the tiles move
+        if col > 0:
+            yield self._slide(self.blank - 1)
+        if col < dimension - 1:
+            yield self._slide(self.blank + 1)
+        if row < dimension - 1:
+            yield self._slide(self.blank + dimension)
+        if row > 0:
+            yield self._slide(self.blank - dimension)
+
+    def _slide(self, pos):
+        """The board with the tile at pos moved into the blank"""
+        bits = self._bits
+        tile = (self.tiles >> (pos * bits)) & ((1 << bits) - 1)
+        distances = _distances(self.dimension)[tile]
+        board = Board.__new__(Board)
+        board.dimension = self.dimension
+        board._bits = bits
+        board.tiles = (self.tiles - (tile << (pos * bits))
+                       + (tile << (self.blank * bits)))
+        board.blank = pos
+        board.manhattan = (self.manhattan - distances[pos]
+                           + distances[self.blank])
+        return board
 
     @staticmethod
     def _exch(flat, a, b):
@@ -101,54 +106,103 @@ class Board():
     def is_goal(self):
         """Is this the goal board?
         """
-        for k in range(len(self.flat) - 1):
-            if k + 1 != self.flat[k]:
-                return False
-        return True
+        return self.tiles == _goal(self.dimension)
 
     def __eq__(self, other):
-        return (self.flat == other.flat)
+        return (self.tiles == other.tiles
+                and self.dimension == other.dimension)
+
+    def __hash__(self):
+        return hash(self.tiles)
 
     def twin(self):
         """a board that is obtained
         by exchanging any pair of tiles
         """
-        for i in range(len(self.flat)):
-            if self.flat[i] != 0:
-                for j in range(i + 1, len(self.flat)):
-                    if self.flat[j] != 0:
-                        t = self._exch(self.flat.copy(), i, j)
+        flat = self.flat
+        for i in range(len(flat)):
+            if flat[i] != 0:
+                for j in range(i + 1, len(flat)):
+                    if flat[j] != 0:
+                        t = self._exch(flat, i, j)
                         break
                 break
         tw = Board([])
-        tw.flat = t
         tw.dimension = self.dimension
+        tw.flat = t
         return tw
 
 
+@cache
+def _bits(dimension):
+    return max(4, (dimension ** 2 - 1).bit_length())
+
+
+def _pack(flat, bits):
+    tiles = 0
+    for tile in reversed(flat):
+        tiles = (tiles << bits) | tile
+    return tiles
+
+
+@cache
+def _goal(dimension):
+    n = dimension ** 2
+    return _pack(list(range(1, n)) + [0], _bits(dimension))
+
+
+@cache
+def _distances(dimension):
+    """_distances(dimension)[tile][pos]: how far tile at pos is from home"""
+    return tuple(
+        tuple(abs((tile - 1) // dimension - pos // dimension)
+              + abs((tile - 1) % dimension - pos % dimension)
+              for pos in range(dimension ** 2))
+        for tile in range(dimension ** 2))
+
+
 @total_ordering
 class SearchNode():
+    __slots__ = ('board', 'moves', 'prev', 'priority')
+
     def __init__(self, board: Board, moves: int, prev):
         self.board = board
         self.moves = moves
         self.prev = prev
         self.priority = moves + self.board.manhattan_distance()
 
+    # among equal priorities the node with more moves comes first:
+    # it is closer to the goal as far as the heuristic can tell
     def __eq__(self, other):
-        return self.priority == other.priority
+        return (self.priority == other.priority
+                and self.moves == other.moves)
 
     def __lt__(self, other):
-        return self.priority < other.priority
+        return (self.priority < other.priority
+                or (self.priority == other.priority
+                    and self.moves > other.moves))
 
 
 class Solver():
-    def __init__(self, initial: Board):
+    """A* on the board and on its twin side by side: exactly one of the two
+    can reach the goal. Each search keeps its open boards in an
+    IndexMinPQ (board -> best SearchNode found so far, so a board is on
+    the queue once, with its best g) and a closed set of expanded boards,
+    so every board is expanded at most once.
+
+    max_closed, if given, caps the closed set (the open queue isn't
+    capped: dropping boards from it could lose the way to the goal); past
+    it the boards closed longest ago are forgotten, and may be expanded
+    again if they turn up. Solutions stay shortest, since a forgotten
+    board coming back by a shorter path just goes on the queue again.
+    """
+    def __init__(self, initial: Board, max_closed=None):
         self.init_node = SearchNode(initial, 0, None)
-        self.queue = MinPQ()
-        self.queue.insert(self.init_node)
         self.twin_init = SearchNode(initial.twin(), 0, None)
-        self.twin_queue = MinPQ()
-        self.twin_queue.insert(self.twin_init)
+        self.max_closed = max_closed
+        self.search = self.seek_soln(self.init_node, max_closed)
+        self.twin_search = self.seek_soln(self.twin_init, max_closed)
+        self._solution = None
 
     def is_solvable(self):
         return self.solution()[0] != -1
@@ -157,34 +211,55 @@ class Solver():
         return self.solution()[0]
 
     @staticmethod
-    def seek_soln(queue):
-        while True:
-            min_node = queue.del_min()
+    def seek_soln(init_node, max_closed=None):
+        """Generator: one A* step per next(), yielding the goal node when
+        it's reached and False otherwise
+        """
+        queue = IndexMinPQ()
+        queue.insert(init_node.board, init_node)
+        closed = OrderedDict()
+        while not queue.is_empty():
+            min_node = queue.min()
+            queue.del_min()
             if min_node.board.is_goal():
                 yield min_node
+            closed[min_node.board] = None
+            if max_closed is not None and len(closed) > max_closed:
+                closed.popitem(last=False)
+            moves = min_node.moves + 1
             for neighbor in min_node.board.neighbors():
-                if min_node.prev is None or neighbor != min_node.prev.board:
-                    queue.insert(SearchNode(
-                        neighbor, min_node.moves + 1, min_node))
+                if neighbor in closed:
+                    continue
+                if not queue.contains(neighbor):
+                    queue.insert(neighbor,
+                                 SearchNode(neighbor, moves, min_node))
+                elif moves < queue.key_of(neighbor).moves:
+                    queue.decrease_key(neighbor,
+                                       SearchNode(neighbor, moves, min_node))
+            yield False
+        while True:  # every reachable board is expanded, none is the goal
             yield False
 
     def solution(self):
+        if self._solution is not None:
+            return self._solution
         min_node = False
         impossible = False
         while min_node is False and impossible is False:
-            min_node = next(self.seek_soln(self.queue))
-            impossible = next(self.seek_soln(self.twin_queue))
+            min_node = next(self.search)
+            impossible = next(self.twin_search)
         if not impossible:
             moves = min_node.moves
             solns = []
             while min_node.prev is not None:
                 solns.append(min_node.board)
                 min_node = min_node.prev
-            solns.append(min_node)
+            solns.append(min_node.board)
             solns.reverse()
-            return (moves, solns)
+            self._solution = (moves, solns)
         else:
-            return (-1, None)
+            self._solution = (-1, None)
+        return self._solution
 
 
 sample = Board([
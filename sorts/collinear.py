@@ -1,6 +1,7 @@
 from typing import List
 from functools import total_ordering
 from math import inf
+from operator import itemgetter
 import matplotlib.pyplot as plt
 
 from mergesort import mergesort
@@ -46,25 +47,6 @@ class Point2D():
         return None
 
 
-@total_ordering
-class Ordered_Slopes():
-    def __init__(self, central: Point2D, secondary: Point2D):
-        self.central = central
-        self.secondary = secondary
-        
-    def __hash__(self):
-        return hash((self.central, self.secondary))
-        
-    def __eq__(self, other):
-        return self.central.slope_to(self.secondary) == other.central.slope_to(other.secondary)
-    
-    def __lt__(self, other):
-        return self.central.slope_to(self.secondary) < other.central.slope_to(other.secondary)
-    
-    def __repr__(self):
-        return str(self.central.slope_to(self.secondary))
-
-
 class LineSegment():
     def __init__(self, a: Point2D, b: Point2D):
         self.a = a
@@ -105,28 +87,47 @@ def FastCollinearPoints(points: List[Point2D]):
     mergesort(points)
     segments = []
     for p in points:
-        slopes = [Ordered_Slopes(p, r) for r in points if r != p]
-        mergesort(slopes)
+        # sort the other points by the slope they make with p, computing
+        # each slope once; points on a line through p then sit together
+        others = [(p.slope_to(r), r) for r in points if r != p]
+        mergesort(others, key=itemgetter(0))
+        slopes = [slope for slope, r in others]
         s_idx = 0
-        while s_idx < (len(slopes) - 3):
+        while s_idx < (len(slopes) - 2):
             if slopes[s_idx] == slopes[s_idx + 1]:
+                first = s_idx
                 n_coll = 2
                 while s_idx < (len(slopes) - 1) and slopes[s_idx] == slopes[s_idx + 1]:
                     n_coll += 1
                     s_idx += 1
                 if 3 < n_coll:
-                    segments.append(LineSegment(slopes[s_idx].central, slopes[s_idx].secondary))
+                    # p may lie anywhere on the line: the segment runs
+                    # from the least to the greatest of its points
+                    line = [r for slope, r in others[first:(s_idx + 1)]]
+                    line.append(p)
+                    segments.append(LineSegment(min(line), max(line)))
             s_idx += 1
     return segments
 
 
-if __name__ == "__main__":
-    with open('kw1260.txt', 'r') as f:
+def read_points(path):
+    """Generator over the points in a file of the form
+    n
+    x1 y1
+    ...
+    one line at a time, so the file itself is never held in memory
+    (sort files too big for that with external_sort.py first)
+    """
+    with open(path, 'r') as f:
         next(f)
-        points = []
         for line in f:
-            coords = [int(coord) for coord in line.split()]
-            points.append(Point2D(coords[0], coords[1]))
+            coords = line.split()
+            if coords:
+                yield Point2D(int(coords[0]), int(coords[1]))
+
+
+if __name__ == "__main__":
+    points = list(read_points('kw1260.txt'))
 
     segments = FastCollinearPoints(points)
 
@@ -9,7 +9,29 @@ def exchange(lst, idx_a, idx_b):
     return None
 
 
-def selection_sort(to_sort: MutableSequence[Hashable]):
+def sort_with_key(sort, a: MutableSequence, key=None, reverse=False):
+    """Sort a in place with sort, ordering items by key(item) and
+    computing each key exactly once: sort runs on (key, index) pairs,
+    and the items are put back in the order the pairs come out in.
+    Indices are unique, so items are never compared, and ties keep their
+    input order whichever sort runs (for reverse=True the index is
+    negated and the result reversed, which keeps ties in order too)
+    """
+    items = list(a)
+    keys = items if key is None else map(key, items)
+    sign = -1 if reverse else 1
+    decorated = [(k, sign * i) for i, k in enumerate(keys)]
+    sort(decorated)
+    if reverse:
+        decorated.reverse()
+    a[:] = [items[sign * i] for k, i in decorated]
+    return None
+
+
+def selection_sort(to_sort: MutableSequence[Hashable], key=None,
+                   reverse=False):
+    if key is not None or reverse:
+        return sort_with_key(selection_sort, to_sort, key, reverse)
     n = len(to_sort)
     for i in range(n):
         minimum = i
@@ -20,13 +42,26 @@ def selection_sort(to_sort: MutableSequence[Hashable]):
     return None
 
 
-def insertion_sort(to_sort: MutableSequence[Hashable]):
-    for i in range(len(to_sort)):
-        for j in range(i, -1, -1):
-            if to_sort[j - 1] > to_sort[j]:
-                exchange(to_sort, j, j - 1)
-            else:
-                break
+def insertion_sort(to_sort: MutableSequence[Hashable], lo=0, hi=None,
+                   key=None, reverse=False):
+    """Sorts to_sort[lo..hi] (inclusive; default the whole list), stably.
+    Shifts larger items right and drops each new item into its place,
+    instead of exchanging it down one step at a time
+    """
+    if hi is None:
+        hi = len(to_sort) - 1
+    if key is not None or reverse:
+        part = to_sort[lo:(hi + 1)]
+        sort_with_key(insertion_sort, part, key, reverse)
+        to_sort[lo:(hi + 1)] = part
+        return None
+    for i in range(lo + 1, hi + 1):
+        item = to_sort[i]
+        j = i
+        while j > lo and item < to_sort[j - 1]:
+            to_sort[j] = to_sort[j - 1]
+            j -= 1
+        to_sort[j] = item
     return None
 
 
@@ -40,7 +75,9 @@ def h_sort(to_sort: MutableSequence[Hashable], h):
     return None
 
 
-def shell_sort(to_sort: MutableSequence[Hashable]):
+def shell_sort(to_sort: MutableSequence[Hashable], key=None, reverse=False):
+    if key is not None or reverse:
+        return sort_with_key(shell_sort, to_sort, key, reverse)
     i = 2
     h = 1
     hs = [h]
@@ -0,0 +1,177 @@
+import os
+import sys
+from itertools import chain
+from tempfile import TemporaryDirectory
+
+from hybrid import natural_mergesort
+from multiway import merge
+
+"""
+External (out-of-core) mergesort, for files of lines that don't fit in
+memory.
+
+Lines are sorted without their line endings ('\n' or '\r\n'), both for
+comparing and for the key, so the order is that of
+sorted(text.splitlines()). The output gets the input's line ending (that
+of its first line) after every line, except that a file whose last line
+had none ends the same way.
+
+1. Read lines until the run in memory reaches the memory budget
+   (estimated from sys.getsizeof of each line plus its list slot; leave
+   room for the (key, index) pairs when sorting with a key), sort it
+   stably with hybrid.natural_mergesort, and spill it to a temporary
+   file. Input that fits in one run never touches the disk.
+2. Merge the run files with multiway.merge (a MinPQ holding the next
+   line of every run). More than FAN_IN runs are merged FAN_IN at a
+   time into longer runs first, so the number of open files stays bounded.
+
+Every file is read and written with a BUFFER-byte buffer, and output is
+written in batches of lines, so the disk sees large sequential reads and
+writes. Keys are computed once while a run is sorted, and once more as
+each line comes back through the merge. Files are opened with
+newline='\n', so a lone '\r' inside a line doesn't split it.
+"""
+
+MEMORY = 64 * 2 ** 20  # default memory budget for a run, in bytes
+FAN_IN = 64  # most runs merged at once
+BUFFER = 2 ** 20  # bytes of buffer per open file
+BATCH = 4096  # lines per write
+
+
+def external_sort(in_path, out_path, key=None, reverse=False, header=0,
+                  memory=MEMORY, tmpdir=None, encoding='utf-8'):
+    """Sort the lines of in_path into out_path. The first header lines are
+    copied over unsorted (e.g. the count at the top of a points file).
+    key, if given, is applied to each line without its line ending
+    """
+    with open(in_path, encoding=encoding, newline='\n',
+              buffering=BUFFER) as f:
+        head = [f.readline() for i in range(header)]
+        seen = {'ending': None, 'last_ended': True}
+        lines = sorted_lines(_strip_endings(f, seen), key, reverse, memory,
+                             tmpdir, encoding)
+        write_lines(out_path, chain(head, _add_endings(lines, seen)),
+                    encoding)
+    return None
+
+
+def sorted_lines(lines, key=None, reverse=False, memory=MEMORY, tmpdir=None,
+                 encoding='utf-8'):
+    """Generator: the lines (strings without line endings) in sorted order,
+    spilling runs to temporary files in tmpdir when they outgrow memory
+    """
+    with TemporaryDirectory(dir=tmpdir) as spill:
+        runs = []
+        for run, last in _runs(lines, memory):
+            natural_mergesort(run, key=key, reverse=reverse)
+            if not runs and last:
+                yield from run  # everything fit in memory
+                return None
+            path = os.path.join(spill, f'run-{len(runs):06d}.txt')
+            write_lines(path, _add_endings(run), encoding)
+            runs.append(path)
+        while len(runs) > FAN_IN:
+            merged = []
+            for i in range(0, len(runs), FAN_IN):
+                path = os.path.join(spill, f'run-{len(runs) + i:06d}.txt')
+                write_lines(path, _add_endings(_merge_files(
+                    runs[i:(i + FAN_IN)], key, reverse, encoding)), encoding)
+                merged.append(path)
+            for path in runs:
+                os.remove(path)
+            runs = merged
+        yield from _merge_files(runs, key, reverse, encoding)
+    return None
+
+
+def _strip_endings(lines, seen):
+    """Generator of the lines without their endings; records in seen the
+    first line's ending and whether the last line had one
+    """
+    for line in lines:
+        if line.endswith('\r\n'):
+            ending = '\r\n'
+        elif line.endswith('\n'):
+            ending = '\n'
+        else:
+            seen['last_ended'] = False  # only the last line can lack one
+            yield line
+            continue
+        if seen['ending'] is None:
+            seen['ending'] = ending
+        yield line[:-len(ending)]
+    return None
+
+
+def _add_endings(lines, seen=None):
+    """Generator of the lines with a line ending after each. With seen
+    (filled in by _strip_endings, and read only after sorting has used up
+    the input) the ending is the input's, and the last line gets none if
+    the input's last line had none
+    """
+    ending = '\n'
+    previous = None
+    for line in lines:
+        if previous is None:
+            if seen is not None and seen['ending'] is not None:
+                ending = seen['ending']
+        else:
+            yield previous + ending
+        previous = line
+    if previous is not None:
+        if seen is None or seen['last_ended']:
+            yield previous + ending
+        else:
+            yield previous
+    return None
+
+
+def _runs(lines, memory):
+    """Generator of (run, whether the input ends with it)"""
+    run = []
+    used = 0
+    for line in lines:
+        run.append(line)
+        used += sys.getsizeof(line) + 8
+        if used >= memory:
+            yield run, False
+            run = []
+            used = 0
+    yield run, True
+    return None
+
+
+def _merge_files(paths, key, reverse, encoding):
+    files = [open(path, encoding=encoding, newline='\n', buffering=BUFFER)
+             for path in paths]
+    try:
+        yield from merge([(line[:-1] for line in f) for f in files], key,
+                         reverse)
+    finally:
+        for f in files:
+            f.close()
+    return None
+
+
+def write_lines(path, lines, encoding='utf-8'):
+    """Write lines through a BUFFER-byte buffer, BATCH lines at a time"""
+    with open(path, 'w', encoding=encoding, newline='\n',
+              buffering=BUFFER) as f:
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) == BATCH:
+                f.writelines(batch)
+                batch.clear()
+        f.writelines(batch)
+    return None
+
+
+if __name__ == "__main__":
+    # sort a points file by y, then x, as Point2D orders them
+    def point_key(line):
+        x, y = line.split()
+        return (int(y), int(x))
+
+    external_sort('input10000.txt', 'input10000_sorted.txt', key=point_key,
+                  header=1, memory=2 ** 18)
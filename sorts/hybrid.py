@@ -0,0 +1,167 @@
+from functools import partial
+from typing import Hashable, MutableSequence
+
+from elementary_sorts import exchange, insertion_sort, sort_with_key
+from numeric import as_numeric, numeric_sort
+from pq import MaxPQ
+from quicksort import choose_pivot, partition
+
+"""
+The textbook sorts, tuned the way library sorts are:
+
+natural_mergesort (stable, the default for hybrid_sort)
+  - finds the runs already in the input (descending runs are reversed),
+    so sorted or nearly sorted input costs O(n) instead of O(n log n)
+  - extends short runs to CUTOFF items with insertion sort, which beats
+    merging on tiny subarrays
+  - skips a merge when the two runs are already in order (a[mid] <= a[mid+1])
+  - merges from a into aux and back again on alternate passes, instead of
+    copying the range into aux before every merge
+
+introsort (not stable)
+  - quicksort with a median-of-3 or ninther pivot instead of a shuffle
+  - insertion sort below CUTOFF items
+  - when the recursion gets deeper than 2 log_2(n) (the pivots keep being
+    bad), the subarray is finished with heapsort: O(n log n) worst case
+"""
+
+CUTOFF = 16  # tuned with benchmarks/suites.py --filter sorts/
+
+
+def hybrid_sort(a: MutableSequence[Hashable], stable=True, key=None,
+                reverse=False):
+    """Sort a in place (with a key or reversed, the result is stable
+    either way: see sort_with_key)
+    """
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, 'mergesort' if stable else 'quicksort', reverse)
+    if key is not None or reverse:
+        return sort_with_key(hybrid_sort, a, key, reverse)
+    if stable:
+        natural_mergesort(a)
+    else:
+        introsort(a)
+    return None
+
+
+def natural_mergesort(a: MutableSequence[Hashable], cutoff=CUTOFF, key=None,
+                      reverse=False):
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, 'mergesort', reverse)
+    if key is not None or reverse:
+        return sort_with_key(partial(natural_mergesort, cutoff=cutoff),
+                             a, key, reverse)
+    n = len(a)
+    if n < 2:
+        return None
+    runs = _runs(a, cutoff)  # run i is a[runs[i]:runs[i + 1]]
+    src = a
+    dst = [None] * n
+    while len(runs) > 2:
+        merged = [0]
+        for i in range(0, len(runs) - 2, 2):
+            lo, mid, hi = runs[i], runs[i + 1], runs[i + 2]
+            _merge_into(src, dst, lo, mid - 1, hi - 1)
+            merged.append(hi)
+        if len(runs) % 2 == 0:  # odd number of runs: the last one sits out
+            lo = runs[-2]
+            dst[lo:n] = src[lo:n]
+            merged.append(n)
+        runs = merged
+        src, dst = dst, src
+    if src is not a:
+        a[:] = src
+    return None
+
+
+def _runs(a, cutoff):
+    """Boundaries of the ascending runs of a, after reversing the strictly
+    descending ones (strictly, so that reversing keeps the sort stable)
+    and extending runs shorter than cutoff with insertion sort
+    """
+    n = len(a)
+    runs = [0]
+    lo = 0
+    while lo < n:
+        hi = lo + 1
+        if hi < n and a[hi] < a[lo]:
+            while hi < n and a[hi] < a[hi - 1]:
+                hi += 1
+            a[lo:hi] = a[lo:hi][::-1]
+        else:
+            while hi < n and not a[hi] < a[hi - 1]:
+                hi += 1
+        if hi - lo < cutoff:
+            hi = min(n, lo + cutoff)
+            insertion_sort(a, lo, hi - 1)
+        runs.append(hi)
+        lo = hi
+    return runs
+
+
+def _merge_into(src, dst, lo: int, mid: int, hi: int):
+    """Merge src[lo..mid] and src[mid+1..hi] into dst[lo..hi]"""
+    if not src[mid + 1] < src[mid]:
+        dst[lo:(hi + 1)] = src[lo:(hi + 1)]
+        return None
+    i = lo
+    j = mid + 1
+    k = lo
+    while i <= mid and j <= hi:
+        if src[j] < src[i]:
+            dst[k] = src[j]
+            j += 1
+        else:
+            dst[k] = src[i]
+            i += 1
+        k += 1
+    # one side is used up: the rest of the other goes over in one slice
+    if i <= mid:
+        dst[k:(hi + 1)] = src[i:(mid + 1)]
+    else:
+        dst[k:(hi + 1)] = src[j:(hi + 1)]
+    return None
+
+
+def introsort(a: MutableSequence[Hashable], cutoff=CUTOFF, key=None,
+              reverse=False):
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, 'quicksort', reverse)
+    if key is not None or reverse:
+        return sort_with_key(partial(introsort, cutoff=cutoff),
+                             a, key, reverse)
+    _introsort(a, 0, len(a) - 1, 2 * len(a).bit_length(), cutoff)
+    return None
+
+
+def _introsort(a, lo, hi, depth, cutoff):
+    while hi - lo + 1 > cutoff:
+        if depth == 0:
+            a[lo:(hi + 1)] = MaxPQ.heapsort(a[lo:(hi + 1)])
+            return None
+        depth -= 1
+        exchange(a, lo, choose_pivot(a, lo, hi))
+        j = partition(a, lo, hi)
+        # recurse into the smaller side and loop on the larger one,
+        # so the stack stays O(log n) deep
+        if j - lo < hi - j:
+            _introsort(a, lo, j - 1, depth, cutoff)
+            lo = j + 1
+        else:
+            _introsort(a, j + 1, hi, depth, cutoff)
+            hi = j - 1
+    insertion_sort(a, lo, hi)
+    return None
+
+
+if __name__ == "__main__":
+    a = list("MERGESORTEXAMPLE")
+    hybrid_sort(a)
+    print(a)
+
+    b = list("QUICKSORTEXAMPLE")
+    hybrid_sort(b, stable=False)
+    print(b)
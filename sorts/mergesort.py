@@ -1,5 +1,8 @@
 from typing import Hashable, MutableSequence
 
+from elementary_sorts import sort_with_key
+from numeric import as_numeric, numeric_sort
+
 
 def is_sorted(a, lo, hi):
     for i in range(lo, hi):
@@ -21,12 +24,12 @@ def merge(a: MutableSequence[Hashable], aux, lo: int, mid: int, hi: int):
         elif j > hi:
             a[k] = aux[i]
             i += 1
-        elif aux[i] < aux[j]:
-            a[k] = aux[i]
-            i += 1
-        else:
+        elif aux[j] < aux[i]:
             a[k] = aux[j]
             j += 1
+        else:  # ties go to the left half: stable
+            a[k] = aux[i]
+            i += 1
     # assert is_sorted(a, lo, hi)
     return None
 
@@ -41,13 +44,24 @@ def sort(a: MutableSequence[Hashable], aux, lo, hi):
     return None
 
 
-def mergesort(a: MutableSequence[Hashable]):
+def mergesort(a: MutableSequence[Hashable], key=None, reverse=False):
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, 'mergesort', reverse)
+    if key is not None or reverse:
+        return sort_with_key(mergesort, a, key, reverse)
     aux = [None] * (len(a))
     sort(a, aux, 0, len(a) - 1)
     return None
 
 
-def bottom_up_mergesort(a: MutableSequence[Hashable]):
+def bottom_up_mergesort(a: MutableSequence[Hashable], key=None,
+                        reverse=False):
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, 'mergesort', reverse)
+    if key is not None or reverse:
+        return sort_with_key(bottom_up_mergesort, a, key, reverse)
     aux = [None] * len(a)
     sz = 1
     while sz < len(a):
@@ -0,0 +1,125 @@
+import numpy as np
+
+from numeric import mergesort_array
+from pq import MaxPQ, MinPQ
+
+"""
+k-way merging of sorted runs.
+
+merge(runs) works on any comparable items: a MinPQ holds the next item
+of every run, so each item out costs O(log k) compares.
+Entries are (key, run, item) triples, so two equal keys come out in run
+order (stable, as long as the runs are in input order); a run has only
+one item in the queue at a time, so no two entries ever tie and items
+are never compared with each other. With reverse=True the runs must be
+sorted in reverse, and a MaxPQ of (key, -run, item) takes over.
+
+merge_arrays(runs, out) is the numeric version. Pulling items one at a
+time would throw away the vectorized sorts, so instead it splits the
+output with splitters picked by regular sampling (k - 1 evenly spaced
+items from every run, sorted, and k - 1 evenly spaced of those): every
+run is cut at the splitters with np.searchsorted, and the pieces between
+two splitters only need merging with each other. Items equal to a
+splitter are split by position (earlier runs first, as a stable merge
+would order them), so that duplicates can't pile up in one group.
+Each group of pieces is merged pairwise (a scatter per pair, as in
+numeric.py) in scratch space the size of the group and written straight
+into out, so nothing the size of the whole input is allocated. Regular
+sampling keeps each group under about 2n/k items.
+"""
+
+
+def merge(runs, key=None, reverse=False):
+    """Generator over the items of the sorted runs (iterables), in order"""
+    iterators = [iter(run) for run in runs]
+    sign = -1 if reverse else 1
+    firsts = []
+    for r, it in enumerate(iterators):
+        for item in it:
+            firsts.append((item if key is None else key(item), sign * r,
+                           item))
+            break
+    pq = (MaxPQ if reverse else MinPQ).from_iterable(firsts)
+    top = pq.max if reverse else pq.min
+    pop = pq.del_max if reverse else pq.del_min
+    while not pq.is_empty():
+        k, r, item = top()
+        yield item
+        for item in iterators[sign * r]:
+            # the run's next item takes its place: one sink, no swim
+            pq.replace((item if key is None else key(item), r, item))
+            break
+        else:
+            pop()
+    return None
+
+
+def merge_arrays(runs, out):
+    """Merge the sorted 1-d arrays in runs into out (a writable array of
+    their total length), stably
+    """
+    runs = [run for run in runs if run.size]
+    k = len(runs)
+    if k == 0:
+        return None
+    if k == 1:
+        out[:] = runs[0]
+        return None
+    samples = np.concatenate(
+        [run[(np.arange(1, k) * run.size) // k] for run in runs])
+    mergesort_array(samples)
+    splitters = samples[(np.arange(1, k) * samples.size) // k]
+    # cut every run before the items equal to each splitter, then hand
+    # out those equal items, run by run (their stable order), until the
+    # group ends as close as it can to its share of the output
+    lo = np.array([np.searchsorted(run, splitters, 'left') for run in runs])
+    equal = np.array([np.searchsorted(run, splitters, 'right')
+                      for run in runs]) - lo
+    total = sum(run.size for run in runs)
+    share = (np.arange(1, k) * total) // k
+    take = np.clip(share - lo.sum(axis=0), 0, equal.sum(axis=0))
+    before = np.cumsum(equal, axis=0) - equal
+    cut = lo + np.clip(take - before, 0, equal)
+    cuts = [np.concatenate(([0], cut[r], [run.size]))
+            for r, run in enumerate(runs)]
+    lo = 0
+    for group in range(k):
+        pieces = [run[cut[group]:cut[group + 1]]
+                  for run, cut in zip(runs, cuts)]
+        hi = lo + sum(piece.size for piece in pieces)
+        _merge_pieces(pieces, out[lo:hi])
+        lo = hi
+    return None
+
+
+def _merge_pieces(pieces, out):
+    """Merge the sorted pieces pairwise, the last round straight into out"""
+    pieces = [piece for piece in pieces if piece.size]
+    if not pieces:
+        return None
+    while len(pieces) > 2:
+        merged = []
+        for i in range(0, len(pieces) - 1, 2):
+            dst = np.empty(pieces[i].size + pieces[i + 1].size,
+                           dtype=out.dtype)
+            merge_two(pieces[i], pieces[i + 1], dst)
+            merged.append(dst)
+        if len(pieces) % 2:
+            merged.append(pieces[-1])
+        pieces = merged
+    if len(pieces) == 1:
+        out[:] = pieces[0]
+    else:
+        merge_two(pieces[0], pieces[1], out)
+    return None
+
+
+def merge_two(left, right, dst):
+    """Merge sorted arrays left and right into dst; ties go left"""
+    if not right[0] < left[-1]:
+        dst[:left.size] = left
+        dst[left.size:] = right
+        return None
+    dst[np.arange(left.size) + np.searchsorted(right, left, 'left')] = left
+    dst[np.arange(right.size) + np.searchsorted(left, right, 'right')] = right
+    return None
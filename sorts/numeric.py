@@ -0,0 +1,340 @@
+from array import array
+
+import numpy as np
+
+"""
+Sorting numbers that sit in a buffer (numpy array, array.array, or a
+writable memoryview) one Python-level comparison at a time wastes almost
+all of the time on the interpreter. Here are the same algorithms written
+as whole-array operations, so each step runs at C speed:
+
+mergesort (stable)
+  - base blocks of BLOCK items are sorted all at once by odd-even
+    transposition sort, one compare-exchange of every adjacent pair per
+    round (it only swaps on a strict <, like insertion sort: stable)
+  - then bottom-up merge passes. Merging two runs is a scatter: an item
+    of the left run lands at its index plus the number of items of the
+    right run < it, an item of the right run at its index plus the
+    number of items of the left run <= it (ties go left: stable).
+    While runs are short, one vectorized binary search covers every run
+    in the pass; once they are long, each pair of runs gets a
+    np.searchsorted, and pairs already in order are copied over
+
+quicksort (not stable)
+  - three-way partitioning around a median-of-3 pivot (Tukey's ninther
+    for subarrays of NINTHER or more, as in quicksort.choose_pivot), done
+    for every subarray of a level at once: each item's class (<, =, > the
+    pivot) and its rank within its class and subarray come from
+    cumulative sums, and give its new position directly
+  - introspective: subarrays still unfinished after 2 log_2(n) levels
+    (bad pivots) are mergesorted instead, so the worst case stays
+    O(n log n)
+  - subarrays of CUTOFF items or fewer are left for one final round of
+    odd-even transposition over the whole array, which never exchanges
+    across a subarray boundary
+
+quickselect (select_many_array for several ranks at once)
+  - the same three-way partition, one subarray at a time, going on only
+    into the sides that hold a wanted rank
+
+NaNs don't compare, so floating point NaNs are moved to the end first
+(as numpy does) and the rest is sorted.
+
+The entry points in mergesort.py, quicksort.py and hybrid.py check their
+input with as_numeric and hand numeric buffers over to numeric_sort
+(mergesort for the stable sorts, quicksort for the others), so callers
+keep the guarantees they had. With a key function they stay on the
+pure Python path.
+"""
+
+BLOCK = 16  # size of the base blocks of mergesort
+CUTOFF = 16  # quicksort leaves subarrays this small to transposition sort
+SEARCH_WIDTH = 64  # runs shorter than this are merged in one vectorized pass
+NINTHER = 40  # pivots are ninthers for subarrays this long, as in quicksort
+
+
+def as_numeric(a):
+    """A writable 1-d numpy view of a, if a is a numeric buffer
+    (numpy array, array.array or memoryview); None for anything else
+    """
+    if isinstance(a, np.ndarray):
+        x = a
+    elif isinstance(a, (array, memoryview)):
+        if isinstance(a, memoryview) and a.readonly:
+            return None
+        try:
+            x = np.asarray(memoryview(a))
+        except (TypeError, ValueError):
+            return None
+    else:
+        return None
+    if x.ndim != 1 or x.dtype.kind not in 'biuf' or not x.flags.writeable:
+        return None
+    return x
+
+
+def numeric_sort(x, algorithm='mergesort', reverse=False):
+    """Sort the numeric view x (see as_numeric) in place with
+    'mergesort' (stable), 'quicksort' (not stable), or any function that
+    sorts a contiguous numeric array without NaNs in place
+    """
+    sort = {'mergesort': mergesort_array,
+            'quicksort': quicksort_array}.get(algorithm, algorithm)
+    work = x if x.flags.c_contiguous else x.copy()
+    if work.dtype.kind == 'b':
+        view = work.view(np.uint8)
+        sort(view)
+    elif work.dtype.kind == 'f':
+        nans = np.isnan(work)
+        count = int(np.count_nonzero(nans))
+        if count:
+            work[:] = np.concatenate((work[~nans], work[nans]))
+        sort(work[:work.size - count])
+    else:
+        sort(work)
+    if reverse:
+        # swap the halves through a buffer half the size
+        half = work.size // 2
+        front = work[:half].copy()
+        work[:half] = work[(work.size - half):][::-1]
+        work[(work.size - half):] = front[::-1]
+    if work is not x:
+        x[:] = work
+    return None
+
+
+def mergesort_array(x, block=BLOCK):
+    n = x.size
+    if n < 2:
+        return None
+    full = n - n % block
+    _transposition_sort(x[:full].reshape(-1, block))
+    _transposition_sort(x[full:].reshape(1, -1))
+    src = x
+    dst = np.empty_like(x)
+    width = block
+    while width < n:
+        if width < SEARCH_WIDTH:
+            _merge_pass_vectorized(src, dst, width)
+        else:
+            _merge_pass(src, dst, width)
+        src, dst = dst, src
+        width *= 2
+    if src is not x:
+        x[:] = src
+    return None
+
+
+def _transposition_sort(rows):
+    """Odd-even transposition sort of every row of a 2-d array at once"""
+    m = rows.shape[1]
+    for parity in range(m):
+        left = rows[:, (parity % 2):(m - 1):2]
+        right = rows[:, (parity % 2 + 1):m:2]
+        swap = right < left
+        smaller = np.where(swap, right, left)
+        right[...] = np.where(swap, left, right)
+        left[...] = smaller
+    return None
+
+
+def _merge_pass(src, dst, width):
+    """Merge runs of width into dst, one pair of runs at a time"""
+    n = src.size
+    offsets = np.arange(width)
+    for lo in range(0, n, 2 * width):
+        mid = min(lo + width, n)
+        hi = min(lo + 2 * width, n)
+        if mid == hi or not src[mid] < src[mid - 1]:
+            dst[lo:hi] = src[lo:hi]
+            continue
+        left = src[lo:mid]
+        right = src[mid:hi]
+        dst[lo + offsets[:(mid - lo)]
+            + np.searchsorted(right, left, 'left')] = left
+        dst[lo + offsets[:(hi - mid)]
+            + np.searchsorted(left, right, 'right')] = right
+    return None
+
+
+def _merge_pass_vectorized(src, dst, width):
+    """Merge runs of width into dst, every pair at once: each item binary
+    searches the other run of its pair for its count. A last, incomplete
+    pair goes through _merge_pass
+    """
+    n = src.size
+    full = n - n % (2 * width)
+    pairs = src[:full].reshape(-1, 2, width)
+    left = pairs[:, 0, :]
+    right = pairs[:, 1, :]
+    rows = np.arange(full // (2 * width))[:, None]
+    out = dst[:full].reshape(-1, 2 * width)
+    offsets = np.arange(width)
+    out[rows, offsets + _count_below(right, left, strict=True)] = left
+    out[rows, offsets + _count_below(left, right, strict=False)] = right
+    _merge_pass(src[full:], dst[full:], width)
+    return None
+
+
+def _count_below(runs, items, strict):
+    """For each row, how many of runs[row] are < (or <=) each of items[row]"""
+    width = runs.shape[1]
+    flat = runs.reshape(-1)
+    base = np.arange(0, flat.size, width)[:, None] - 1
+    count = np.zeros(items.shape, dtype=np.intp)
+    step = 1 << (width.bit_length() - 1)
+    while step:
+        probe = np.minimum(count + step, width)
+        below = flat[base + probe]
+        below = below < items if strict else below <= items
+        count = np.where(below, probe, count)
+        step //= 2
+    return count
+
+
+def quicksort_array(x, cutoff=CUTOFF):
+    n = x.size
+    itype = np.int32 if n < 2 ** 31 else np.int64
+    starts = np.zeros(1, dtype=itype)
+    ends = np.full(1, n, dtype=itype)
+    small_starts = []
+    small_ends = []
+    for depth in range(2 * n.bit_length() + 1):
+        lens = ends - starts
+        big = lens > cutoff
+        small = ~big & (lens > 1)
+        small_starts.append(starts[small])
+        small_ends.append(ends[small])
+        starts, ends, lens = starts[big], ends[big], lens[big]
+        if not starts.size:
+            break
+        if depth == 2 * n.bit_length():
+            for lo, hi in zip(starts.tolist(), ends.tolist()):
+                mergesort_array(x[lo:hi])
+            break
+        # the items of every subarray, one after another
+        firsts = np.cumsum(lens, dtype=itype) - lens
+        seg = np.repeat(np.arange(starts.size, dtype=itype), lens)
+        at = np.arange(firsts[-1] + lens[-1], dtype=itype)
+        idx = at + (starts - firsts)[seg]
+        vals = x[idx]
+        pivot = _pivots(x, starts, lens)[seg]
+        less = vals < pivot
+        equal = ~(less | (pivot < vals))
+        # running counts of each class, through all the subarrays at once;
+        # an item's rank within its class and subarray is its running
+        # count less the count before its subarray
+        n_less_so_far = np.cumsum(less, dtype=itype)
+        n_equal_so_far = np.cumsum(equal, dtype=itype)
+        less_before = n_less_so_far[firsts] - less[firsts]
+        equal_before = n_equal_so_far[firsts] - equal[firsts]
+        lasts = firsts + lens - 1
+        n_less = n_less_so_far[lasts] - less_before
+        n_equal = n_equal_so_far[lasts] - equal_before
+        # new place in vals: less, then equal, then greater, per subarray
+        to_less = firsts - less_before - 1
+        to_equal = to_less + less_before + n_less - equal_before
+        to_greater = less_before + n_less + equal_before + n_equal - 1
+        place = np.where(
+            less, n_less_so_far + to_less[seg],
+            np.where(equal, n_equal_so_far + to_equal[seg],
+                     at + 1 - n_less_so_far - n_equal_so_far
+                     + to_greater[seg]))
+        partitioned = np.empty_like(vals)
+        partitioned[place] = vals
+        x[idx] = partitioned
+        starts, ends = (np.concatenate((starts, starts + n_less + n_equal)),
+                        np.concatenate((starts + n_less, ends)))
+    _segmented_transposition_sort(x, np.concatenate(small_starts),
+                                  np.concatenate(small_ends), cutoff)
+    return None
+
+
+def _median_of_3(a, b, c):
+    return np.maximum(np.minimum(a, b), np.minimum(np.maximum(a, b), c))
+
+
+def _pivots(x, starts, lens):
+    """A pivot for every x[starts[i]:starts[i] + lens[i]]: the median of
+    the first, middle and last items, or the ninther when it's long
+    """
+    mid = starts + lens // 2
+    last = starts + lens - 1
+    pivots = _median_of_3(x[starts], x[mid], x[last])
+    wide = lens >= NINTHER
+    if wide.any():
+        lo, mid, hi = starts[wide], mid[wide], last[wide]
+        eps = lens[wide] // 8
+        pivots[wide] = _median_of_3(
+            _median_of_3(x[lo], x[lo + eps], x[lo + 2 * eps]),
+            _median_of_3(x[mid - eps], x[mid], x[mid + eps]),
+            _median_of_3(x[hi - 2 * eps], x[hi - eps], x[hi]))
+    return pivots
+
+
+def _segmented_transposition_sort(x, starts, ends, rounds):
+    """Sort every x[starts[i]:ends[i]] (none longer than rounds) at once"""
+    n = x.size
+    if not starts.size or n < 2:
+        return None
+    depth = np.zeros(n, dtype=np.intp)
+    np.add.at(depth, starts, 1)
+    np.add.at(depth, ends - 1, -1)
+    inside = np.cumsum(depth)[:-1] > 0  # i and i + 1 in the same subarray
+    for parity in range(rounds):
+        p = parity % 2
+        left = x[p:(n - 1):2]
+        right = x[(p + 1):n:2]
+        swap = inside[p::2] & (right < left)
+        smaller = np.where(swap, right, left)
+        right[...] = np.where(swap, left, right)
+        left[...] = smaller
+    return None
+
+
+def quickselect_array(x, k, cutoff=CUTOFF):
+    """Rearrange x so that x[k] is the item that belongs there in sorted
+    order, with nothing larger before it and nothing smaller after it;
+    returns x[k]
+    """
+    select_many_array(x, [k], cutoff)
+    return x[k]
+
+
+def select_many_array(x, ks, cutoff=CUTOFF):
+    """quickselect for several ranks in one pass: partition, then go on
+    only into the sides that still hold some of the ks. After
+    2 log_2(n) partitions without finishing (bad pivots), a subarray is
+    mergesorted instead (introselect). Returns x[ks]
+    """
+    wanted = np.unique(np.asarray(ks, dtype=np.intp))
+    if wanted.size and not (0 <= wanted[0] and wanted[-1] < x.size):
+        raise IndexError("rank out of range")
+    # subarrays x[lo:hi] still to partition, with the ranks
+    # wanted[first:last] that fall inside them
+    stack = [(0, x.size, 0, wanted.size, 2 * x.size.bit_length())]
+    while stack:
+        lo, hi, first, last, depth = stack.pop()
+        seg = x[lo:hi]
+        if hi - lo <= cutoff:
+            _transposition_sort(seg.reshape(1, -1))
+            continue
+        if depth == 0:
+            mergesort_array(seg)
+            continue
+        pivot = _pivots(seg, np.zeros(1, dtype=np.intp),
+                        np.full(1, hi - lo, dtype=np.intp))[0]
+        less = seg < pivot
+        greater = pivot < seg
+        n_less = int(np.count_nonzero(less))
+        n_equal = hi - lo - n_less - int(np.count_nonzero(greater))
+        seg[:] = np.concatenate((seg[less], seg[~(less | greater)],
+                                 seg[greater]))
+        left, right = np.searchsorted(wanted[first:last],
+                                      [lo + n_less, lo + n_less + n_equal])
+        if left > 0:
+            stack.append((lo, lo + n_less, first, first + left, depth - 1))
+        if first + right < last:
+            stack.append((lo + n_less + n_equal, hi, first + right, last,
+                          depth - 1))
+    return x[np.asarray(ks, dtype=np.intp)]
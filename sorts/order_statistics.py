@@ -0,0 +1,131 @@
+from bisect import bisect_left, bisect_right
+from math import floor
+from typing import Hashable, Iterable, MutableSequence
+
+import numpy as np
+
+from elementary_sorts import exchange, insertion_sort
+from hybrid import CUTOFF, hybrid_sort
+from numeric import as_numeric, select_many_array
+from pq import MaxPQ, MinPQ
+from quicksort import choose_pivot, partition
+
+"""
+Order statistics without sorting everything.
+
+select_many(a, ks)   several order statistics from one partitioning pass:
+                     after each partition only the sides that still hold
+                     a wanted rank are partitioned further, so p50, p90
+                     and p99 cost about as much as one quickselect.
+                     Like quickselect it's introspective: a subarray still
+                     unfinished after 2 log_2(n) partitions is heapsorted
+partial_sort(a, k)   the k smallest items, sorted, at the front of a
+top_k(items, k)      the k largest (or smallest) items of any iterable,
+                     streamed through a heap of at most k items
+percentiles(a, ps)   linearly interpolated percentiles, one select_many
+
+select_many, partial_sort and percentiles rearrange a in place (as
+quickselect does); numeric buffers go through numeric.select_many_array.
+"""
+
+
+def select_many(a: MutableSequence[Hashable], ks):
+    """[the item of rank k for k in ks]; a ends up partitioned around them"""
+    n = len(a)
+    x = as_numeric(a)
+    if x is not None and not (x.dtype.kind == 'f' and np.isnan(x).any()):
+        select_many_array(x, ks)
+        return [a[k] for k in ks]
+    wanted = sorted(set(ks))
+    if wanted and not (0 <= wanted[0] and wanted[-1] < n):
+        raise IndexError("rank out of range")
+    # subarrays a[lo..hi] still to partition, with the ranks
+    # wanted[first:last] that fall inside them
+    stack = [(0, n - 1, 0, len(wanted), 2 * n.bit_length())]
+    while stack:
+        lo, hi, first, last, depth = stack.pop()
+        if hi - lo < CUTOFF:
+            insertion_sort(a, lo, hi)
+            continue
+        if depth == 0:
+            a[lo:(hi + 1)] = MaxPQ.heapsort(a[lo:(hi + 1)])
+            continue
+        exchange(a, lo, choose_pivot(a, lo, hi))
+        j = partition(a, lo, hi)
+        left = bisect_left(wanted, j, first, last)
+        right = bisect_right(wanted, j, left, last)
+        if first < left:
+            stack.append((lo, j - 1, first, left, depth - 1))
+        if right < last:
+            stack.append((j + 1, hi, right, last, depth - 1))
+    return [a[k] for k in ks]
+
+
+def partial_sort(a: MutableSequence[Hashable], k: int):
+    """Rearrange a so that a[:k] holds its k smallest items, in order"""
+    n = len(a)
+    if k <= 0:
+        return None
+    if k < n:
+        select_many(a, [k - 1])
+    front = a[:k]
+    hybrid_sort(front)
+    a[:k] = front
+    return None
+
+
+def top_k(items: Iterable, k: int, largest=True, key=None):
+    """The k largest (or smallest) items, best first; equal keys keep
+    their input order. Numeric buffers are copied and partitioned;
+    anything else is streamed through a bounded heap, O(n log k)
+    """
+    if k <= 0:
+        return []
+    x = as_numeric(items) if key is None else None
+    if x is not None:
+        x = x.copy()
+        n = x.size
+        k = min(k, n)
+        if not largest:
+            partial_sort(x, k)
+            return x[:k].tolist()
+        if k < n:
+            select_many(x, [n - k])
+        best = x[(n - k):]
+        hybrid_sort(best)
+        return best[::-1].tolist()
+    # the heap keeps the best k so far, with the worst of them on top;
+    # entries are (key, index, item), with the index negated for largest,
+    # so that among equal keys the latest item is the one evicted
+    pq = MinPQ() if largest else MaxPQ()
+    worst = pq.min if largest else pq.max
+    evict = pq.del_min if largest else pq.del_max
+    sign = -1 if largest else 1
+    size = 0
+    for i, item in enumerate(items):
+        entry = (item if key is None else key(item), sign * i, item)
+        if size < k:
+            pq.insert(entry)
+            size += 1
+        elif (worst() < entry) if largest else (entry < worst()):
+            pq.replace(entry)
+    best = []
+    while not pq.is_empty():
+        best.append(evict()[2])
+    best.reverse()
+    return best
+
+
+def percentiles(a: MutableSequence, ps):
+    """Percentiles ps (0 to 100) of a, interpolating linearly between
+    order statistics (numpy's default method)
+    """
+    n = len(a)
+    if n == 0:
+        raise ValueError("no percentiles of an empty sequence")
+    ranks = [p / 100 * (n - 1) for p in ps]
+    below = [floor(r) for r in ranks]
+    above = [min(b + 1, n - 1) for b in below]
+    values = dict(zip(below + above, select_many(a, below + above)))
+    return [values[b] + (r - b) * (values[t] - values[b])
+            for r, b, t in zip(ranks, below, above)]
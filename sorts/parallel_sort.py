@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Hashable, MutableSequence
+
+import numpy as np
+
+from elementary_sorts import sort_with_key
+from hybrid import natural_mergesort
+from multiway import merge, merge_arrays
+from numeric import as_numeric, mergesort_array, numeric_sort
+
+"""
+Parallel mergesort: split the input into one chunk per worker process,
+sort the chunks side by side, and k-way merge them in the driver.
+
+Numeric buffers (see numeric.as_numeric) are copied once into a
+multiprocessing.shared_memory block; every worker attaches to it and
+sorts its own slice in place with numeric.mergesort_array, so nothing
+but the block's name and the slice bounds crosses between processes.
+The driver then merges the sorted slices straight back into the caller's
+buffer (multiway.merge_arrays), with scratch space of about 2n/k.
+
+That copy is the one full-size buffer the numeric path allocates (plus
+the SharedMemory block's page mapping), and it is deliberate: the caller's
+buffer is private to its process, and a k-way merge can't write over
+its own input anyway, so the sorted slices have to live somewhere other
+than the output while they are merged.
+
+Anything else goes the pickling way: chunks are sent to the workers,
+sorted there with hybrid.natural_mergesort, sent back, and merged
+through a MinPQ (multiway.merge) into the caller's list.
+
+Both paths are stable. Below MIN_PARALLEL items, starting the processes
+costs more than it saves, and the sort runs in the driver.
+"""
+
+MIN_PARALLEL = 100000
+
+
+def parallel_sort(a: MutableSequence[Hashable], workers=None, key=None,
+                  reverse=False):
+    """Sort a in place using workers processes (default: one per CPU)"""
+    workers = workers or os.cpu_count()
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, partial(_sort_shared, workers=workers),
+                            reverse)
+    if key is not None or reverse:
+        return sort_with_key(partial(parallel_sort, workers=workers),
+                             a, key, reverse)
+    n = len(a)
+    if workers < 2 or n < MIN_PARALLEL:
+        natural_mergesort(a)
+        return None
+    bounds = _bounds(n, workers)
+    chunks = [a[lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+    with ProcessPoolExecutor(workers) as pool:
+        runs = list(pool.map(_sort_chunk, chunks))
+    for i, item in enumerate(merge(runs)):
+        a[i] = item
+    return None
+
+
+def _bounds(n, chunks):
+    return [(i * n) // chunks for i in range(chunks + 1)]
+
+
+def _sort_chunk(chunk):
+    natural_mergesort(chunk)
+    return chunk
+
+
+def _sort_shared(x, workers):
+    n = x.size
+    if workers < 2 or n < MIN_PARALLEL:
+        mergesort_array(x)
+        return None
+    bounds = _bounds(n, workers)
+    shm = SharedMemory(create=True, size=x.nbytes)
+    shared = None
+    try:
+        shared = np.ndarray(x.shape, dtype=x.dtype, buffer=shm.buf)
+        shared[:] = x
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(partial(_sort_slice, shm.name, x.dtype.str, n),
+                          bounds[:-1], bounds[1:]))
+        merge_arrays([shared[lo:hi] for lo, hi in zip(bounds, bounds[1:])],
+                     x)
+    finally:
+        del shared  # the block can't close while views of it are alive
+        shm.close()
+        shm.unlink()
+    return None
+
+
+def _sort_slice(name, dtype, n, lo, hi):
+    """Worker: sort shared[lo:hi] of the block called name in place"""
+    shm = SharedMemory(name=name)
+    shared = None
+    try:
+        shared = np.ndarray((n,), dtype=np.dtype(dtype), buffer=shm.buf)
+        mergesort_array(shared[lo:hi])
+    finally:
+        del shared
+        shm.close()
+    return None
+
@@ -0,0 +1,31 @@
+import importlib.util
+import os
+import sys
+
+"""
+MinPQ and MaxPQ for the sorts, from ../priority_queues.
+
+The two modules are loaded from their files instead of putting
+priority_queues on sys.path, so importing a sort doesn't change where
+every later import looks. They are registered in sys.modules under their
+usual names, so code that does have priority_queues on its path (the
+benchmarks) gets these same classes, not second copies.
+"""
+
+PQ_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      '..', 'priority_queues')
+
+
+def _load(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(PQ_DIR, name + '.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+MinPQ = _load('MinPQ').MinPQ
+MaxPQ = _load('MaxPQ_heapsort').MaxPQ
@@ -1,5 +1,10 @@
 from typing import MutableSequence, Hashable
-from random import shuffle
+from functools import partial
+
+import numpy as np
+
+from elementary_sorts import sort_with_key
+from numeric import as_numeric, numeric_sort, quickselect_array
 
 
 def exchange(lst, idx_a, idx_b):
@@ -10,43 +15,109 @@ def exchange(lst, idx_a, idx_b):
 
 
 def partition(a: MutableSequence[Hashable], lo: int, hi: int) -> int:
-    i = lo + 1
-    j = hi
+    i = lo
+    j = hi + 1
     while True:
+        # step past the last exchange first, so keys equal to
+        # the pivot can't make i and j swap them back and forth forever
+        i += 1
         while a[i] < a[lo]:
-            i += 1
             if i == hi:
                 break
+            i += 1
+        j -= 1
         while a[lo] < a[j]:
-            j -= 1
             if j == lo:
                 break
+            j -= 1
         if i >= j:
-            exchange(a, lo, j)
             break
         exchange(a, i, j)
+    exchange(a, lo, j)
     return j
 
 
-def sort(a: MutableSequence, lo: int, hi: int):
-    if hi <= lo:
-        return None
-    j = partition(a, lo, hi)
-    sort(a, lo, j - 1)
-    sort(a, j + 1, hi)
+"""
+No shuffle up front: each partition picks its own pivot, the median of
+3 items (first, middle, last) or, for subarrays of NINTHER or more,
+Tukey's ninther (the median of the medians of three evenly spaced
+triples), and swaps it to the front. Sorted, reverse-sorted and
+organ-pipe inputs then split evenly without spending a pass and n random
+numbers on a shuffle.
+
+The sorts don't recurse: the larger side of each partition waits on an
+explicit stack while the smaller side is sorted, so the stack never
+holds more than log_2(n) subarrays, however bad the pivots get.
+"""
+
+NINTHER = 40  # use the ninther for subarrays at least this long
+
+
+def median_of_3(a, i, j, k):
+    """Index of the median of a[i], a[j] and a[k]"""
+    if a[i] < a[j]:
+        if a[j] < a[k]:
+            return j
+        return k if a[i] < a[k] else i
+    if a[i] < a[k]:
+        return i
+    return k if a[j] < a[k] else j
+
 
+def choose_pivot(a, lo, hi):
+    """Index of a pivot for a[lo..hi]: median of 3, or the ninther"""
+    n = hi - lo + 1
+    mid = lo + n // 2
+    if n < NINTHER:
+        return median_of_3(a, lo, mid, hi)
+    eps = n // 8
+    return median_of_3(a,
+                       median_of_3(a, lo, lo + eps, lo + eps + eps),
+                       median_of_3(a, mid - eps, mid, mid + eps),
+                       median_of_3(a, hi - eps - eps, hi - eps, hi))
 
-def quicksort(a: MutableSequence):
-    shuffle(a)
-    sort(a, 0, len(a) - 1)
+
+def sort(a: MutableSequence, lo: int, hi: int):
+    stack = []
+    while True:
+        if hi > lo:
+            exchange(a, lo, choose_pivot(a, lo, hi))
+            j = partition(a, lo, hi)
+            if j - lo < hi - j:
+                stack.append((j + 1, hi))
+                hi = j - 1
+            else:
+                stack.append((lo, j - 1))
+                lo = j + 1
+        elif stack:
+            lo, hi = stack.pop()
+        else:
+            return None
+
+
+def quicksort(a: MutableSequence, key=None, reverse=False, dual_pivot=False):
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, 'quicksort', reverse)
+    if key is not None or reverse:
+        return sort_with_key(partial(quicksort, dual_pivot=dual_pivot),
+                             a, key, reverse)
+    if dual_pivot:
+        dual_pivot_sort(a, 0, len(a) - 1)
+    else:
+        sort(a, 0, len(a) - 1)
     return None
 
 
 def quickselect(a: MutableSequence, k: int):
-    shuffle(a)
+    x = as_numeric(a)
+    if x is not None and not (x.dtype.kind == 'f' and np.isnan(x).any()):
+        quickselect_array(x, k)
+        return a[k]
     lo = 0
     hi = len(a) - 1
     while hi > lo:
+        exchange(a, lo, choose_pivot(a, lo, hi))
         j = partition(a, lo, hi)
         if j < k:
             lo = j + 1
@@ -58,33 +129,109 @@ def quickselect(a: MutableSequence, k: int):
 
 
 def three_way_sort(a: MutableSequence, lo, hi):
-    if hi <= lo:
-        return None
-    lt = lo
-    gt = hi
-    v = a[lo]
-    i = lo
-    while i <= gt:
-        if a[i] < v:
-            exchange(a, lt, i)
-            lt += 1
-            i += 1
-        elif a[i] > v:
-            exchange(a, i, gt)
-            gt -= 1
+    stack = []
+    while True:
+        if hi <= lo:
+            if not stack:
+                return None
+            lo, hi = stack.pop()
+            continue
+        exchange(a, lo, choose_pivot(a, lo, hi))
+        lt = lo
+        gt = hi
+        v = a[lo]
+        i = lo
+        while i <= gt:
+            if a[i] < v:
+                exchange(a, lt, i)
+                lt += 1
+                i += 1
+            elif a[i] > v:
+                exchange(a, i, gt)
+                gt -= 1
+            else:
+                i += 1
+        if lt - lo < hi - gt:
+            stack.append((gt + 1, hi))
+            hi = lt - 1
         else:
-            i += 1
-    three_way_sort(a, lo, lt - 1)
-    three_way_sort(a, gt + 1, hi)
-    return None
+            stack.append((lo, lt - 1))
+            lo = gt + 1
 
 
-def three_way_quicksort(a: MutableSequence):
-    shuffle(a)
+def three_way_quicksort(a: MutableSequence, key=None, reverse=False):
+    x = as_numeric(a) if key is None else None
+    if x is not None:
+        return numeric_sort(x, 'quicksort', reverse)
+    if key is not None or reverse:
+        return sort_with_key(three_way_quicksort, a, key, reverse)
     three_way_sort(a, 0, len(a) - 1)
     return None
 
 
+def dual_pivot_sort(a: MutableSequence, lo, hi):
+    """Yaroslavskiy's dual-pivot partitioning: pivots p <= q (the second
+    and fourth of five evenly spaced items) split a[lo..hi] into
+    < p, between p and q, and > q. The middle part is skipped when p == q,
+    since it then holds only copies of the pivot
+    """
+    stack = []
+    while True:
+        if hi <= lo:
+            if not stack:
+                return None
+            lo, hi = stack.pop()
+            continue
+        _dual_pivots(a, lo, hi)
+        p = a[lo]
+        q = a[hi]
+        lt = lo + 1
+        gt = hi - 1
+        i = lo + 1
+        while i <= gt:
+            if a[i] < p:
+                exchange(a, i, lt)
+                lt += 1
+                i += 1
+            elif q < a[i]:
+                exchange(a, i, gt)
+                gt -= 1
+            else:
+                i += 1
+        lt -= 1
+        gt += 1
+        exchange(a, lo, lt)
+        exchange(a, hi, gt)
+        parts = [(lo, lt - 1), (gt + 1, hi)]
+        if p < q:
+            parts.append((lt + 1, gt - 1))
+        # sort the smallest part next, the others wait on the stack
+        parts.sort(key=lambda part: part[0] - part[1])
+        stack.extend(parts[:-1])
+        lo, hi = parts[-1]
+
+
+def _dual_pivots(a, lo, hi):
+    """Move two pivots, p <= q, to a[lo] and a[hi]"""
+    n = hi - lo + 1
+    if n >= 12:
+        step = n // 6
+        mid = lo + n // 2
+        sample = [mid - 2 * step, mid - step, mid, mid + step, mid + 2 * step]
+        # insertion sort the five sample items in place
+        for s in range(1, 5):
+            for t in range(s, 0, -1):
+                if a[sample[t]] < a[sample[t - 1]]:
+                    exchange(a, sample[t], sample[t - 1])
+                else:
+                    break
+        exchange(a, lo, sample[1])
+        exchange(a, hi, sample[3])
+    if a[hi] < a[lo]:
+        exchange(a, lo, hi)
+    return None
+
+
 if __name__ == "__main__":
     a = list("QUICKSORTEXAMPLE")
     quicksort(a)
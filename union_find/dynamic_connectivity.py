@@ -0,0 +1,112 @@
+from union_find import RollbackUF
+
+"""
+Offline dynamic connectivity: edges come and go, and we want to know
+whether two objects are connected at given moments.
+Union-find can't delete an edge, but it can undo the most recent unions
+(RollbackUF), and that is enough when the whole sequence is known up front.
+
+Every edge is present over a few intervals of time. Put the queries on
+the leaves of a segment tree and hang each interval on the O(log q) tree
+nodes that cover it exactly. A depth-first walk unions a node's edges on
+the way down and rolls them back on the way up, so at each leaf the
+union-find holds exactly the edges present at that query.
+Each interval is unioned O(log q) times at O(log n) a union:
+O((m + q) log m log n) overall for m updates and q queries.
+"""
+
+
+def offline_connectivity(n, operations):
+    """operations is a sequence of ('add', u, v), ('remove', u, v) and
+    ('query', u, v) on objects 0 .. n - 1. Edges are undirected and may be
+    added more than once (each remove takes away one copy).
+    Returns the answer to every query, in order
+    """
+    queries = []  # (u, v) of each query
+    intervals = []  # (first query, one past last query, u, v)
+    open_since = {}  # edge -> query counts when each copy was added
+    for op, u, v in operations:
+        edge = (min(u, v), max(u, v))
+        if op == 'add':
+            open_since.setdefault(edge, []).append(len(queries))
+        elif op == 'remove':
+            starts = open_since.get(edge)
+            if not starts:
+                raise ValueError(f"removing edge {edge} that isn't there")
+            intervals.append((starts.pop(), len(queries)) + edge)
+        elif op == 'query':
+            queries.append((u, v))
+        else:
+            raise ValueError(f"unknown operation {op!r}")
+    for edge, starts in open_since.items():
+        for start in starts:
+            intervals.append((start, len(queries)) + edge)
+
+    q = len(queries)
+    if q == 0:
+        return []
+    tree = [[] for i in range(4 * q)]  # edges hung on each node
+    for lo, hi, u, v in intervals:
+        if lo < hi:
+            _hang(tree, 1, 0, q, lo, hi, (u, v))
+
+    uf = RollbackUF(n)
+    answers = [None] * q
+    _walk(tree, uf, queries, answers, 1, 0, q)
+    return answers
+
+
+def _hang(tree, node, node_lo, node_hi, lo, hi, edge):
+    """Hang edge on the nodes covering [lo, hi) within [node_lo, node_hi)"""
+    if hi <= node_lo or node_hi <= lo:
+        return None
+    if lo <= node_lo and node_hi <= hi:
+        tree[node].append(edge)
+        return None
+    mid = (node_lo + node_hi) // 2
+    _hang(tree, 2 * node, node_lo, mid, lo, hi, edge)
+    _hang(tree, 2 * node + 1, mid, node_hi, lo, hi, edge)
+    return None
+
+
+def _walk(tree, uf, queries, answers, node, node_lo, node_hi):
+    token = uf.snapshot()
+    for u, v in tree[node]:
+        uf.union(u, v)
+    if node_hi - node_lo == 1:
+        u, v = queries[node_lo]
+        answers[node_lo] = uf.find(u, v)
+    else:
+        mid = (node_lo + node_hi) // 2
+        _walk(tree, uf, queries, answers, 2 * node, node_lo, mid)
+        _walk(tree, uf, queries, answers, 2 * node + 1, mid, node_hi)
+    uf.rollback(token)
+    return None
+
+
+def percolation_replay(lattice, events):
+    """Replay site events on a lattice (see lattices.py):
+    ('open', idx), ('close', idx), and ('percolates',),
+    which asks whether the open sites connect top and bottom.
+    Returns the answers to the 'percolates' events, in order,
+    without rebuilding anything when a site closes
+    """
+    top, bottom = lattice.top, lattice.bottom
+    degree = lattice.degree
+    neighbors = lattice.neighbors
+    is_open = bytearray(lattice.n_sites + 3)
+    is_open[top] = is_open[bottom] = 1
+    operations = []
+    for event in events:
+        if event[0] == 'percolates':
+            operations.append(('query', top, bottom))
+            continue
+        kind, idx = event
+        if (kind == 'open') == bool(is_open[idx]):
+            continue  # opening an open site or closing a closed one
+        op = 'add' if kind == 'open' else 'remove'
+        for c in set(neighbors[degree * idx:degree * (idx + 1)]):
+            if is_open[c] and c != idx:
+                operations.append((op, idx, c))
+        is_open[idx] = kind == 'open'
+    return offline_connectivity(lattice.n_sites + 2, operations)
@@ -0,0 +1,220 @@
+from array import array
+from functools import lru_cache
+import numpy as np
+from scipy.ndimage import label
+
+import union_find
+
+"""
+Lattice topologies for percolation.
+
+A lattice numbers its sites 0 .. n_sites - 1 and precomputes, once per
+(lattice, n, periodic), a neighbor table: n_sites rows of `degree` ints,
+flattened into one array('i'). Besides real sites, a row can point at
+    top      (n_sites)     - virtual site above the first row/layer
+    bottom   (n_sites + 1) - virtual site below the last row/layer
+    sentinel (n_sites + 2) - stands in for a missing neighbor; never open
+The system percolates when top and bottom are connected, so
+periodic=True only wraps the directions perpendicular to the spanning axis
+(a square lattice becomes a cylinder; a cubic lattice wraps in x and y).
+
+Known thresholds, for checking:
+                 site      bond
+    square     0.592746    1/2
+    triangular    1/2    0.347296
+    cubic      0.311608  0.248812
+"""
+
+
+class Lattice():
+    """Subclasses set dimension and degree, and build the table in _table"""
+    dimension = 2
+    degree = 4
+    name = "lattice"
+
+    def __init__(self, n, periodic=False):
+        self.n = n
+        self.periodic = periodic
+        self.n_sites = n ** self.dimension
+        self.top = self.n_sites
+        self.bottom = self.top + 1
+        self.sentinel = self.top + 2
+        self.neighbors = _neighbor_table(type(self), n, periodic)
+
+    def __repr__(self):
+        shape = " by ".join([str(self.n)] * self.dimension)
+        periodic = " (periodic)" if self.periodic else ""
+        return f"{shape} {self.name}{periodic}"
+
+    def table(self):
+        """The neighbor table as a read-only (n_sites, degree) numpy view"""
+        return np.frombuffer(self.neighbors, dtype=np.int32).reshape(
+            self.n_sites, self.degree)
+
+    def bonds(self):
+        """(n_bonds, 2) array of site pairs, each bond once, lower index first.
+        Bonds to the virtual sites are not included
+        """
+        return _bonds(type(self), self.n, self.periodic)
+
+    def top_sites(self):
+        """Indices of the sites joined to the virtual top"""
+        return _boundary(type(self), self.n, self.periodic)[0]
+
+    def bottom_sites(self):
+        """Indices of the sites joined to the virtual bottom"""
+        return _boundary(type(self), self.n, self.periodic)[1]
+
+    def site_spans(self, open_sites):
+        """Do the open sites (boolean mask) connect top and bottom?
+        Non-periodic lattices label clusters with scipy.ndimage.label;
+        periodic ones fall back to one batch of union_many
+        """
+        if self.periodic:
+            bonds = self.bonds()
+            return self._spans(open_sites,
+                               bonds[open_sites[bonds].all(axis=1)])
+        labels, _ = label(open_sites.reshape((self.n,) * self.dimension),
+                          structure=self._structure())
+        labels = labels.ravel()
+        spanning = np.intersect1d(labels[self.top_sites()],
+                                  labels[self.bottom_sites()])
+        return spanning.size > 0 and spanning[-1] > 0
+
+    def bond_spans(self, open_bonds):
+        """Do the open bonds (boolean mask over bonds()) connect
+        top and bottom? Every site counts as open
+        """
+        open_sites = np.ones(self.n_sites, dtype=bool)
+        return self._spans(open_sites, self.bonds()[open_bonds])
+
+    def _spans(self, open_sites, pairs):
+        uf = union_find.ArrayWeightedQuickUnionPathCompressionUF(
+            self.n_sites + 2)
+        to_top = self.top_sites()[open_sites[self.top_sites()]]
+        to_bottom = self.bottom_sites()[open_sites[self.bottom_sites()]]
+        uf.union_many(pairs)
+        uf.union_many(np.stack((to_top, np.full_like(to_top, self.top)), 1))
+        uf.union_many(np.stack((to_bottom,
+                                np.full_like(to_bottom, self.bottom)), 1))
+        return uf.find(self.top, self.bottom)
+
+    def _structure(self):
+        """Connectivity of the table, in scipy.ndimage.label's format"""
+        return None
+
+
+class SquareLattice(Lattice):
+    """n-by-n grid, row-major; neighbors above, below, left, right"""
+    name = "grid"
+
+    @staticmethod
+    def _table(n, periodic):
+        top, bottom, sentinel = n ** 2, n ** 2 + 1, n ** 2 + 2
+        idx = np.arange(n ** 2, dtype=np.int32)
+        row = idx // n
+        col = idx % n
+        table = np.empty((n ** 2, 4), dtype=np.int32)
+        table[:, 0] = np.where(row > 0, idx - n, top)
+        table[:, 1] = np.where(row < n - 1, idx + n, bottom)
+        table[:, 2] = _shift(idx, col, -1, 1, n, periodic, sentinel)
+        table[:, 3] = _shift(idx, col, 1, 1, n, periodic, sentinel)
+        return table
+
+
+class TriangularLattice(Lattice):
+    """n-by-n grid with one diagonal added (up-right and down-left),
+    which gives every interior site the 6 neighbors of a triangular lattice
+    """
+    degree = 6
+    name = "triangular lattice"
+
+    def _structure(self):
+        return np.array([[0, 1, 1],
+                         [1, 1, 1],
+                         [1, 1, 0]])
+
+    @staticmethod
+    def _table(n, periodic):
+        sentinel = n ** 2 + 2
+        table = np.empty((n ** 2, 6), dtype=np.int32)
+        table[:, :4] = SquareLattice._table(n, periodic)
+        col = np.arange(n ** 2, dtype=np.int32) % n
+        up, down = table[:, 0], table[:, 1]
+        is_site = up < n ** 2
+        table[:, 4] = np.where(
+            is_site, _shift(up, col, 1, 1, n, periodic, sentinel), up)
+        is_site = down < n ** 2
+        table[:, 5] = np.where(
+            is_site, _shift(down, col, -1, 1, n, periodic, sentinel), down)
+        return table
+
+
+class CubicLattice(Lattice):
+    """n-by-n-by-n lattice, index = z * n^2 + y * n + x;
+    percolates along z (layer 0 to layer n - 1)
+    """
+    dimension = 3
+    degree = 6
+    name = "cubic lattice"
+
+    @staticmethod
+    def _table(n, periodic):
+        top, bottom, sentinel = n ** 3, n ** 3 + 1, n ** 3 + 2
+        idx = np.arange(n ** 3, dtype=np.int32)
+        z = idx // n ** 2
+        y = (idx // n) % n
+        x = idx % n
+        table = np.empty((n ** 3, 6), dtype=np.int32)
+        table[:, 0] = np.where(z > 0, idx - n ** 2, top)
+        table[:, 1] = np.where(z < n - 1, idx + n ** 2, bottom)
+        table[:, 2] = _shift(idx, y, -1, n, n, periodic, sentinel)
+        table[:, 3] = _shift(idx, y, 1, n, n, periodic, sentinel)
+        table[:, 4] = _shift(idx, x, -1, 1, n, periodic, sentinel)
+        table[:, 5] = _shift(idx, x, 1, 1, n, periodic, sentinel)
+        return table
+
+
+def _shift(idx, coord, step, stride, n, periodic, sentinel):
+    """Index of the site one step along an axis with the given stride,
+    wrapping around or falling off (sentinel) at the edges
+    """
+    moved = coord + step
+    inside = (0 <= moved) & (moved < n)
+    if periodic:
+        return idx + ((moved % n) - coord) * stride
+    return np.where(inside, idx + step * stride, sentinel)
+
+
+@lru_cache(maxsize=16)
+def _neighbor_table(lattice_class, n, periodic):
+    """Built once per lattice and size, then shared by every trial;
+    treat it as read-only
+    """
+    neighbors = array('i')
+    neighbors.frombytes(lattice_class._table(n, periodic).tobytes())
+    return neighbors
+
+
+@lru_cache(maxsize=16)
+def _boundary(lattice_class, n, periodic):
+    n_sites = n ** lattice_class.dimension
+    table = np.frombuffer(_neighbor_table(lattice_class, n, periodic),
+                          dtype=np.int32).reshape(n_sites, -1)
+    top = np.flatnonzero((table == n_sites).any(axis=1))
+    bottom = np.flatnonzero((table == n_sites + 1).any(axis=1))
+    top.flags.writeable = False
+    bottom.flags.writeable = False
+    return top, bottom
+
+
+@lru_cache(maxsize=16)
+def _bonds(lattice_class, n, periodic):
+    n_sites = n ** lattice_class.dimension
+    table = lattice_class._table(n, periodic)
+    sites = np.repeat(np.arange(n_sites, dtype=np.int32), table.shape[1])
+    others = table.ravel()
+    keep = (others < n_sites) & (sites < others)
+    bonds = np.unique(np.stack((sites[keep], others[keep]), axis=1), axis=0)
+    bonds.flags.writeable = False
+    return bonds
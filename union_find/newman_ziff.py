@@ -0,0 +1,163 @@
+import os
+from functools import partial
+import numpy as np
+from scipy.stats import binom
+
+from lattices import SquareLattice
+from percolation_monte_carlo import stream_thresholds
+
+"""
+Newman-Ziff: instead of stopping each trial as soon as the lattice
+percolates, occupy every site (or bond) of a random permutation in one
+union-find sweep and record what the system looks like after each one.
+One sweep costs about the same as a single threshold run, but gives
+
+    largest[k]    size of the largest cluster
+    spans[k]      1 if top and bottom are connected, else 0
+    mean_size[k]  mean size of the cluster containing a random occupied
+                  site, leaving out the largest cluster
+                  (sum of s^2 over the other clusters / sites in them)
+
+for every occupation count k = 0 .. N, averaged over trials
+(the "microcanonical" curves).
+Curves at a fixed occupation probability p follow by convolving with
+the binomial distribution: Q(p) = sum_k C(N, k) p^k (1 - p)^(N - k) Q[k]
+
+Reference: M. E. J. Newman and R. M. Ziff,
+"Fast Monte Carlo algorithm for site or bond percolation", PRE 64 (2001)
+"""
+
+TOP = 1
+BOTTOM = 2
+
+
+class NewmanZiff():
+    """Run trials full sweeps on lattice(n) (site or bond percolation)"""
+    def __init__(self, n, trials, lattice=SquareLattice, bond=False,
+                 seed=None, workers=1):
+        """Trials are seeded and streamed the same way as in
+        PercolationStats, so results don't depend on workers
+        """
+        self.lattice = lattice(n)
+        self.bond = bond
+        if bond:
+            self.units = len(self.lattice.bonds())
+        else:
+            self.units = self.lattice.n_sites
+        master = np.random.SeedSequence(seed)
+        self.seed = master.entropy
+        trial = partial(_run_sweep, n, lattice, bond)
+        self.trials = 0
+        self.largest = np.zeros(self.units + 1)
+        self.spans = np.zeros(self.units + 1)
+        self.mean_size = np.zeros(self.units + 1)
+        self.thresholds = []
+        for largest, spans, mean_size in stream_thresholds(
+                trial, master.spawn(trials), workers or os.cpu_count()):
+            self.trials += 1
+            self.largest += largest
+            self.spans += spans
+            self.mean_size += mean_size
+            self.thresholds.append(np.argmax(spans) / self.units)
+        self.largest /= self.trials
+        self.spans /= self.trials
+        self.mean_size /= self.trials
+
+    def curve(self, p, quantity="spans"):
+        """Value of quantity ("largest", "spans" or "mean_size")
+        at occupation probability p (a float or an array of them)
+        """
+        values = getattr(self, quantity)
+        k = np.arange(self.units + 1)
+        ps = np.atleast_1d(np.asarray(p, dtype=float))
+        out = np.array([binom.pmf(k, self.units, q) @ values for q in ps])
+        return out if np.ndim(p) else out[0]
+
+
+def sweep(lattice, order, bond=False):
+    """One sweep: occupy the sites (or bonds) of lattice in the given
+    order, which has to be a permutation of all of them.
+    Returns the largest, spans and mean_size arrays, indexed by k
+    """
+    n_sites = lattice.n_sites
+    units = len(order)
+    boundary = bytearray(n_sites)
+    for idx in lattice.top_sites().tolist():
+        boundary[idx] |= TOP
+    for idx in lattice.bottom_sites().tolist():
+        boundary[idx] |= BOTTOM
+    # weighted quick-union with path halving, on plain lists;
+    # flags[root] has the TOP/BOTTOM bits of every site in the cluster
+    parent = list(range(n_sites))
+    size = [1] * n_sites
+    largest = np.zeros(units + 1, dtype=np.int64)
+    spans = np.zeros(units + 1, dtype=np.int8)
+    mean_size = np.zeros(units + 1)
+    if bond:
+        flags = bytearray(boundary)
+        occupied = n_sites
+        biggest = 1 if n_sites else 0
+        square_sum = n_sites
+        spanning = (TOP | BOTTOM) in flags
+        ends = lattice.bonds()[order].tolist()
+    else:
+        flags = bytearray(n_sites)
+        occupied = 0
+        biggest = 0
+        square_sum = 0
+        spanning = False
+        is_open = bytearray(n_sites)
+        neighbors = lattice.neighbors
+        degree = lattice.degree
+        ends = order.tolist() if hasattr(order, 'tolist') else order
+    largest[0] = biggest
+    spans[0] = spanning
+    if occupied > biggest:
+        mean_size[0] = (square_sum - biggest ** 2) / (occupied - biggest)
+
+    for k in range(1, units + 1):
+        if bond:
+            s, c = ends[k - 1]
+            links = (c,)
+        else:
+            s = ends[k - 1]
+            is_open[s] = 1
+            flags[s] = boundary[s]
+            occupied += 1
+            square_sum += 1
+            biggest = max(biggest, 1)
+            spanning = spanning or flags[s] == (TOP | BOTTOM)
+            links = neighbors[degree * s:degree * (s + 1)]
+        for c in links:
+            if c >= n_sites or not (bond or is_open[c]):
+                continue
+            r1 = s
+            while parent[r1] != r1:
+                parent[r1] = parent[parent[r1]]
+                r1 = parent[r1]
+            r2 = c
+            while parent[r2] != r2:
+                parent[r2] = parent[parent[r2]]
+                r2 = parent[r2]
+            if r1 == r2:
+                continue
+            if size[r1] < size[r2]:
+                r1, r2 = r2, r1
+            parent[r2] = r1
+            square_sum += 2 * size[r1] * size[r2]
+            size[r1] += size[r2]
+            flags[r1] |= flags[r2]
+            biggest = max(biggest, size[r1])
+            spanning = spanning or flags[r1] == (TOP | BOTTOM)
+        largest[k] = biggest
+        spans[k] = spanning
+        if occupied > biggest:
+            mean_size[k] = (square_sum - biggest ** 2) / (occupied - biggest)
+    return largest, spans, mean_size
+
+
+def _run_sweep(n, lattice, bond, seed_seq):
+    rng = np.random.default_rng(seed_seq)
+    system = lattice(n)
+    units = len(system.bonds()) if bond else system.n_sites
+    return sweep(system, rng.permutation(units), bond)
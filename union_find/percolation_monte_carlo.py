@@ -1,14 +1,26 @@
+import os
 import random
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from warnings import warn
 from math import sqrt
+import numpy as np
 from scipy.stats import t
 
 import union_find
+from lattices import SquareLattice
 
 """
 Exercise: estimate the percolation threshold p* for large square lattices
 (p* is known to be about 0.592746) using a Monte-Carlo simulation
 
+Other geometries (triangular, cubic, periodic boundaries) plug in through
+the lattice argument, and bond percolation through BondPercolation;
+see lattices.py
+
 Performance requirements:
 Constructor must take O(n^2)
 Other methods must take constant time
@@ -17,43 +29,113 @@ plus constant number of calls to union and find, which themselves must take O(lo
 
 
 class Percolation():
-    def __init__(self, n, uf_class):
+    __slots__ = ('n', 'lattice', 'matrix', 'no_of_open_sites', 'uf',
+                 'top', 'bottom', 'neighbors', 'degree')
+
+    def __init__(self, n, uf_class, lattice=SquareLattice):
         """
         A cell is closed if it is 0; open if it is 1
-        Top is indexed at n ** 2; bottom is indexed at n ** 2 + 1
+        (one byte per cell in a bytearray)
+        Sites are numbered by the lattice (row-major n-by-n by default);
+        top is indexed at n ** 2; bottom is indexed at n ** 2 + 1
         Top and bottom begin open and isolated.
+        n ** 2 + 2 is a sentinel that stays closed forever;
+        it stands in for missing neighbors in the neighbor table
         The matrix percolates just in case top and bottom are connected
         Keep track of count of open sites to maintain constant time
+        lattice is called with n to build the topology, e.g.
+        lattices.CubicLattice or partial(SquareLattice, periodic=True)
         """
         self.n = n
-        self.matrix = [0 for i in range(0, self.n ** 2)] + [1, 1]
+        self.lattice = lattice(n)
+        self.top = self.lattice.top
+        self.bottom = self.lattice.bottom
+        self.matrix = bytearray(self.top + 3)
+        self.matrix[self.top] = 1
+        self.matrix[self.bottom] = 1
         self.no_of_open_sites = 0
-        self.uf = uf_class(self.n ** 2 + 2)
-        self.top = n ** 2
-        self.bottom = self.top + 1
+        self.uf = uf_class(self.top + 2)
+        self.neighbors = self.lattice.neighbors
+        self.degree = self.lattice.degree
 
     def __str__(self):
-        output = ""
-        for i in range(self.n):
-            for j in range(self.n):
-                if self.matrix[i * self.n + j] == 1:
-                    output += " "
-                else:
-                    output += "#"
-            output += "\n"
-        return output
+        """One line of n cells per row (rows of successive layers
+        follow each other on 3D lattices)
+        """
+        n = self.n
+        output = bytearray(b"\n") * (self.top + self.top // n)
+        for i in range(self.top // n):
+            output[i * (n + 1):i * (n + 1) + n] = self.matrix[i * n:(i + 1) * n]
+        return output.translate(_CELL_CHARS).decode("ascii")
+
+    def rows(self):
+        """Yield the grid one line at a time, same format as str(),
+        so a big lattice can be written out without building one huge string
+        """
+        n = self.n
+        for i in range(self.top // n):
+            row = self.matrix[i * n:(i + 1) * n].translate(_CELL_CHARS)
+            yield row.decode("ascii") + "\n"
 
     def is_open(self, idx):
         return self.matrix[idx] == 1
 
     def open(self, idx):
-        if not self.is_open(idx):
-            self.matrix[idx] = 1  # mark as open
+        matrix = self.matrix
+        if not matrix[idx]:
+            matrix[idx] = 1  # mark as open
             self.no_of_open_sites += 1
-            for c in self._neighbors(idx):
-                if self.is_open(c):  # connect to open neighbors
-                    self.uf.union(idx, c)
+            # connect to open neighbors; nothing is allocated,
+            # and the square lattice's four are unrolled
+            neighbors = self.neighbors
+            union = self.uf.union
+            degree = self.degree
+            k = degree * idx
+            if degree == 4:
+                c = neighbors[k]
+                if matrix[c]:
+                    union(idx, c)
+                c = neighbors[k + 1]
+                if matrix[c]:
+                    union(idx, c)
+                c = neighbors[k + 2]
+                if matrix[c]:
+                    union(idx, c)
+                c = neighbors[k + 3]
+                if matrix[c]:
+                    union(idx, c)
+            else:
+                for k in range(k, k + degree):
+                    c = neighbors[k]
+                    if matrix[c]:
+                        union(idx, c)
+        return None
+
+    def open_many(self, idxs):
+        """Open a batch of sites at once.
+        With a uf_class that has union_many (the array-backed one),
+        all the new connections go through in a single batch
+        """
+        idxs = np.unique(np.asarray(idxs, dtype=np.int64))
+        matrix = np.frombuffer(self.matrix, dtype=np.bool_)
+        self.no_of_open_sites += idxs.size - np.count_nonzero(matrix[idxs])
+        matrix[idxs] = True
+        neighbors = self.lattice.table()[idxs].ravel()
+        sites = np.repeat(idxs, self.degree)
+        pairs = np.stack((sites, neighbors), axis=1)[matrix[neighbors]]
+        _union_pairs(self.uf, pairs)
         return None
+
+    def open_until_percolates(self, order):
+        """Bulk mode: open sites in the given order (say, a shuffled
+        permutation of all sites) until the grid percolates.
+        Returns the number of sites from order that had to be opened.
+        """
+        order = np.asarray(order, dtype=np.int64)
+        already_open = np.frombuffer(self.matrix, dtype=np.bool_)[:self.top]
+        step = percolation_step(self.lattice, order, already_open)
+        self.open_many(order[:step])
+        return step
     
     def is_full(self, idx):
         return self.uf.find(idx, self.top)
@@ -61,57 +143,271 @@ class Percolation():
     def percolates(self):
         return self.uf.find(self.top, self.bottom)
 
-    def _neighbors(self, idx):
-        neighbors = []
-        # above
-        if idx < self.n:
-            neighbors.append(self.top)
-        else:
-            neighbors.append(idx - self.n)
-        # below
-        if (self.n * (self.n - 1)) <= idx:
-            neighbors.append(self.bottom)
+
+class BondPercolation():
+    """Bond percolation on the same lattices:
+    every site is open, and the bonds between neighbors open one at a time.
+    Sites next to the virtual top/bottom are joined to it from the start.
+    Bonds are numbered as in lattice.bonds()
+    """
+    __slots__ = ('n', 'lattice', 'bonds', 'opened', 'no_of_open_bonds',
+                 'uf', 'top', 'bottom')
+
+    def __init__(self, n, uf_class, lattice=SquareLattice):
+        self.n = n
+        self.lattice = lattice(n)
+        self.top = self.lattice.top
+        self.bottom = self.lattice.bottom
+        bonds = self.lattice.bonds()
+        self.bonds = array('i')
+        self.bonds.frombytes(bonds.astype(np.int32).tobytes())
+        self.opened = bytearray(len(bonds))
+        self.no_of_open_bonds = 0
+        self.uf = uf_class(self.top + 2)
+        for idx in self.lattice.top_sites().tolist():
+            self.uf.union(self.top, idx)
+        for idx in self.lattice.bottom_sites().tolist():
+            self.uf.union(self.bottom, idx)
+
+    def is_open(self, bond):
+        return self.opened[bond] == 1
+
+    def open(self, bond):
+        if not self.opened[bond]:
+            self.opened[bond] = 1
+            self.no_of_open_bonds += 1
+            self.uf.union(self.bonds[2 * bond], self.bonds[2 * bond + 1])
+        return None
+
+    def open_many(self, bonds):
+        bonds = np.unique(np.asarray(bonds, dtype=np.int64))
+        opened = np.frombuffer(self.opened, dtype=np.bool_)
+        self.no_of_open_bonds += bonds.size - np.count_nonzero(opened[bonds])
+        opened[bonds] = True
+        _union_pairs(self.uf, self.lattice.bonds()[bonds])
+        return None
+
+    def open_until_percolates(self, order):
+        """Bulk mode, as in Percolation.open_until_percolates"""
+        order = np.asarray(order, dtype=np.int64)
+        already_open = np.frombuffer(self.opened, dtype=np.bool_)
+        step = percolation_step(self.lattice, order, already_open, bond=True)
+        self.open_many(order[:step])
+        return step
+
+    def is_full(self, idx):
+        return self.uf.find(idx, self.top)
+
+    def percolates(self):
+        return self.uf.find(self.top, self.bottom)
+
+
+def _union_pairs(uf, pairs):
+    if hasattr(uf, 'union_many'):
+        uf.union_many(pairs)
+    else:
+        for n1, n2 in pairs.tolist():
+            uf.union(n1, n2)
+    return None
+
+
+_CELL_CHARS = bytes.maketrans(b"\x00\x01", b"# ")
+
+
+def percolation_step(lattice, order, already_open=None, bond=False):
+    """Smallest k such that opening order[:k] (on top of already_open)
+    makes the lattice percolate. lattice is a lattices.Lattice,
+    or an int n for the n-by-n grid; with bond=True, order and
+    already_open refer to bonds instead of sites.
+
+    Percolation is monotone in k, so bisect over prefix lengths;
+    each probe labels the open clusters of the prefix
+    (scipy.ndimage.label on non-periodic site lattices)
+    and checks whether one touches both the top and the bottom.
+    O(n^2 log n) vectorized work instead of O(n^2) Python-level unions
+    """
+    if isinstance(lattice, int):
+        lattice = SquareLattice(lattice)
+    if bond:
+        units = len(lattice.bonds())
+        spans = lattice.bond_spans
+    else:
+        units = lattice.n_sites
+        spans = lattice.site_spans
+    order = np.asarray(order, dtype=np.int64)
+    opened_at = np.full(units, len(order), dtype=np.int64)
+    opened_at[order] = np.arange(len(order))
+    if already_open is not None:
+        opened_at[already_open] = -1
+
+    def percolates(k):
+        return spans(opened_at < k)
+
+    lo = 0
+    hi = len(order)
+    if percolates(lo):
+        return lo
+    if not percolates(hi):
+        raise ValueError("lattice does not percolate even with everything open")
+    while hi - lo > 1:  # invariant: prefix lo does not percolate, hi does
+        mid = lo + (hi - lo) // 2
+        if percolates(mid):
+            hi = mid
         else:
-            neighbors.append(idx + self.n)
-        # left
-        if idx % self.n != 0:
-            neighbors.append(idx - 1)
-        # right
-        if idx % self.n != (self.n - 1):
-            neighbors.append(idx + 1)
-        return neighbors
+            lo = mid
+    return hi
 
 
 class PercolationStats():
     """Perform independent trials on an n-by-n grid
+    (or any lattice(n), with site or bond percolation)
     """
-    def __init__(self, n, trials, uf_class=union_find.WeightedQuickUnionUF):
+    def __init__(self, n, trials, uf_class=union_find.WeightedQuickUnionUF,
+                 bulk=False, workers=1, seed=None, precision=None,
+                 lattice=SquareLattice, bond=False):
+        """bulk=True finds each threshold with percolation_step
+        on a whole shuffled permutation (uf_class is not used)
+
+        lattice is called with n to build the topology (see lattices.py);
+        it has to be picklable (a class or a partial) when workers > 1.
+        bond=True opens bonds instead of sites, and the threshold is
+        the fraction of bonds open.
+
+        Every trial gets its own numpy Generator, spawned from one
+        master SeedSequence, so a given seed gives the same thresholds
+        whether the trials run in one process or across a pool of workers.
+        With seed=None, self.seed records the entropy that was drawn.
+        workers=None uses every core.
+
+        With precision=eps, trials is an upper bound: stop launching trials
+        once the 95% confidence interval half-width drops below eps
+        (checked after every trial, from the 30th on).
+        Results are consumed in trial order, so where it stops
+        doesn't depend on the number of workers either.
+        """
         if trials < 2:
             raise ValueError("trials must be > 1")
         elif trials < 30:
             warn("Should run at least 30 trials")
-        thresholds = []
-        for i in range(0, trials):
-            thresholds.append(self.percolation_threshold(n, uf_class))
-        self.df = trials - 1
-        self.mean = sum(thresholds) / trials
-        self.stddev = sum([(t - self.mean) ** 2 for t in thresholds]) / self.df
-        self.stderr = self.stddev / sqrt(trials)
-        CI_95 = 0.025
-        self.confidenceLo = self.mean + t.ppf(CI_95, self.df) * (self.stderr)
-        self.confidenceHi = self.mean - t.ppf(CI_95, self.df) * (self.stderr)
-        self.stats = (f'For {trials} trials on a {n} by {n} grid:\n'
+        master = np.random.SeedSequence(seed)
+        self.seed = master.entropy
+        trial_seeds = master.spawn(trials)
+        running = RunningStats()
+        trial = partial(_run_trial, n, uf_class, bulk, lattice, bond)
+        thresholds = stream_thresholds(trial, trial_seeds,
+                                       workers or os.cpu_count())
+        for threshold in thresholds:
+            running.push(threshold)
+            if (precision is not None and running.count >= 30
+                    and running.half_width() < precision):
+                thresholds.close()
+                break
+        self.trials = running.count
+        self.df = running.count - 1
+        self.mean = running.mean
+        self.variance = running.variance()
+        self.stddev = running.stddev()
+        self.stderr = running.stderr()
+        half_width = running.half_width()
+        self.confidenceLo = self.mean - half_width
+        self.confidenceHi = self.mean + half_width
+        system = f'a {lattice(n)}' + (' (bond percolation)' if bond else '')
+        self.stats = (f'For {self.trials} trials on {system}:\n'
                       f'mean = {self.mean}\n'
                       f'std dev. = {self.stddev}\n'
                       f'95% confidence: [{self.confidenceLo}, {self.confidenceHi}]')
 
     @staticmethod
-    def percolation_threshold(n, uf_class):
-        choices = list(range(n ** 2))
-        random.shuffle(choices)
-        percolation = Percolation(n, uf_class)
+    def percolation_threshold(n, uf_class, rng=None,
+                              lattice=SquareLattice, bond=False):
+        if bond:
+            percolation = BondPercolation(n, uf_class, lattice)
+            units = len(percolation.opened)
+        else:
+            percolation = Percolation(n, uf_class, lattice)
+            units = percolation.top
+        if rng is None:
+            choices = list(range(units))
+            random.shuffle(choices)
+        else:
+            choices = rng.permutation(units).tolist()
         open_sites = 0
         while not percolation.percolates():
             percolation.open(choices.pop())
             open_sites += 1
-        return open_sites / (n ** 2)
\ No newline at end of file
+        return open_sites / units
+
+    @staticmethod
+    def percolation_threshold_bulk(n, rng=None,
+                                   lattice=SquareLattice, bond=False):
+        system = lattice(n)
+        units = len(system.bonds()) if bond else system.n_sites
+        choices = (np.random if rng is None else rng).permutation(units)
+        return percolation_step(system, choices, bond=bond) / units
+
+
+class RunningStats():
+    """Welford's online mean and variance:
+    one pass, constant memory, no catastrophic cancellation
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # sum of squared deviations from the current mean
+
+    def push(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        return None
+
+    def variance(self):
+        """Sample variance (n - 1 in the denominator)"""
+        return self._m2 / (self.count - 1)
+
+    def stddev(self):
+        return sqrt(self.variance())
+
+    def stderr(self):
+        return self.stddev() / sqrt(self.count)
+
+    def half_width(self, confidence=0.95):
+        """Half-width of the Student t confidence interval for the mean"""
+        return t.ppf(0.5 + confidence / 2, self.count - 1) * self.stderr()
+
+
+def stream_thresholds(trial, trial_seeds, workers=1):
+    """Yield trial(seed_seq) for each seed, in trial order, as they finish.
+    Only about two trials per worker are in flight at once,
+    so closing the generator early stops launching new ones
+    """
+    if workers == 1:
+        for seed_seq in trial_seeds:
+            yield trial(seed_seq)
+        return
+    seeds = iter(trial_seeds)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(trial, seed_seq)
+                        for seed_seq in islice(seeds, 2 * workers))
+        try:
+            while pending:
+                threshold = pending.popleft().result()
+                for seed_seq in islice(seeds, 1):
+                    pending.append(pool.submit(trial, seed_seq))
+                yield threshold
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _run_trial(n, uf_class, bulk, lattice, bond, seed_seq):
+    """One trial with its own RNG stream
+    (module-level so it can be pickled for the process pool)
+    """
+    rng = np.random.default_rng(seed_seq)
+    if bulk:
+        return PercolationStats.percolation_threshold_bulk(
+            n, rng, lattice, bond)
+    return PercolationStats.percolation_threshold(
+        n, uf_class, rng, lattice, bond)
@@ -10,29 +10,91 @@ do not need to preserve the path,
 only the fact that there is one. 'is connected to' is an equivalence relation;
 these algorithms exploit that fact
 """
+import threading
+from contextlib import nullcontext
+
+import numpy as np
                 
 
-class QuickFindUF():
+class _ComponentTracking():
+    """Bookkeeping shared by all the classes below:
+    a live count of components, the size of the largest one, and a
+    circular linked list threaded through the members of each component
+    (next[i] is the member after i), so that listing a component's
+    members costs time proportional to its size, not to n.
+    Two circular lists become one by swapping the next pointers of any
+    one member of each: O(1) per union
+    """
+    def _track(self, n):
+        self._count = n
+        self._largest = 1 if n else 0
+        self.next = list(range(0, n))
+
+    def count(self):
+        """Number of components"""
+        return self._count
+
+    def largest(self):
+        """Size of the largest component"""
+        return self._largest
+
+    def members(self, x):
+        """Iterate over the members of x's component, starting with x"""
+        nxt = self.next
+        yield x
+        y = nxt[x]
+        while y != x:
+            yield y
+            y = nxt[y]
+
+    def _merged(self, a, b, size):
+        """a's and b's components were just joined into one of this size"""
+        nxt = self.next
+        nxt[a], nxt[b] = nxt[b], nxt[a]
+        self._count -= 1
+        if size > self._largest:
+            self._largest = size
+        return None
+
+
+class QuickFindUF(_ComponentTracking):
     """The text's first approach:
     Eager
     initialize: O(n)
     union: O(n) <-- this is still a problem for n unions
     find: O(1)
+    Relabelling in place, and only the members of the smaller component
+    (walked with members()), brings union down to O(size of the smaller
+    component): O(n log n) for any sequence of unions, since an object
+    is only relabelled when its component at least doubles
     """    
     def __init__(self, n: int):
         self.components = list(range(0, n))
+        self.sz = [1] * n  # indexed by component id
+        self._track(n)
         
     def find(self, n1, n2):
         return self.components[n1] == self.components[n2]
+
+    def size_of(self, x):
+        return self.sz[self.components[x]]
     
     def union(self, n1, n2):
-        self.components = [self.components[n2] 
-                           if self.components[n1] == n 
-                           else n 
-                           for n in self.components]
+        p = self.components[n1]
+        q = self.components[n2]
+        if p == q:
+            return None
+        if self.sz[p] > self.sz[q]:
+            n1, n2, p, q = n2, n1, q, p
+        components = self.components
+        for n in self.members(n1):
+            components[n] = q
+        self.sz[q] += self.sz[p]
+        self._merged(n1, n2, self.sz[q])
+        return None
 
 
-class QuickUnionUF():
+class QuickUnionUF(_ComponentTracking):
     """Lazy approach
     Interpretation: id[i] is parent of i
     Root of i is id[id[...id[i]...]] <-- keep going until it doesn't change
@@ -40,16 +102,29 @@ class QuickUnionUF():
     initialize: O(n)
     union: O(n) <-- includes cost of finding roots
     find: O(n)
+    sz[root] is the size of root's tree; only the weighted
+    classes use it to balance, but every class can answer size_of
     """
     def __init__(self, n: int):
         self.components = list(range(0, n))
+        self.sz = [1] * n
+        self._track(n)
     
     def find(self, n1, n2):
         return self._root(n1) == self._root(n2)
+
+    def size_of(self, x):
+        return self.sz[self._root(x)]
     
     def union(self, n1, n2):
         r1 = self._root(n1)
-        self.components[r1] = self._root(n2)
+        r2 = self._root(n2)
+        if r1 == r2:
+            return None
+        self.components[r1] = r2
+        self.sz[r2] += self.sz[r1]
+        self._merged(r1, r2, self.sz[r2])
+        return None
      
     def _root(self, n):
         while n != self.components[n]:
@@ -74,10 +149,6 @@ class WeightedQuickUnionUF(QuickUnionUF):
     find: O(log_2(n)) <- tree stays balanced, depth is at most log_2(n)
     union: O(log_2(n)) <- constant time, given roots
     """
-    def __init__(self, n: int):
-        super().__init__(n)
-        self.sz = [1 for n in self.components]
-        
     def find(self, n1, n2):
         return self._root(n1) == self._root(n2)
         
@@ -85,13 +156,16 @@ class WeightedQuickUnionUF(QuickUnionUF):
         r1 = self._root(n1)
         r2 = self._root(n2)
         if r1 == r2:
-            pass
+            return None
         elif self.sz[r1] < self.sz[r2]:
             self.components[r1] = r2
             self.sz[r2] += self.sz[r1]
+            self._merged(r1, r2, self.sz[r2])
         else:
             self.components[r2] = r1
             self.sz[r1] += self.sz[r2]
+            self._merged(r1, r2, self.sz[r1])
+        return None
 
         
 class WeightedQuickUnionPathCompressionUF(WeightedQuickUnionUF):
@@ -99,14 +173,324 @@ class WeightedQuickUnionPathCompressionUF(WeightedQuickUnionUF):
     After finding the root, compress the nodes on the path
     to keep the tree as flat as possible.
     """
-    def _root(self, n1):
-        def parent(n):
-            return self.components[n]
-        nodes = [n1]
-        while n1 != parent(n1):
-            n1 = parent(n1)
-            nodes.append(n1)
-        root = n1
-        for n in nodes:
-            self.components[n] = root
-        return root
\ No newline at end of file
+    def _root(self, n):
+        components = self.components
+        root = n
+        while root != components[root]:
+            root = components[root]
+        while n != root:  # second pass: point the path at the root
+            components[n], n = root, components[n]
+        return root
+
+
+"""
+Full compression takes two passes over the path. Path halving and path
+splitting compress in the same pass that finds the root, with the same
+amortized bound (inverse Ackermann, with weighting by size or rank):
+halving points every other node on the path at its grandparent,
+splitting points every node at its grandparent.
+None of the _root methods allocate anything.
+"""
+
+
+class WeightedQuickUnionPathHalvingUF(WeightedQuickUnionUF):
+    def _root(self, n):
+        components = self.components
+        while n != components[n]:
+            components[n] = components[components[n]]
+            n = components[n]
+        return n
+
+
+class WeightedQuickUnionPathSplittingUF(WeightedQuickUnionUF):
+    def _root(self, n):
+        components = self.components
+        parent = components[n]
+        while n != parent:
+            components[n] = components[parent]
+            n = parent
+            parent = components[n]
+        return n
+
+
+class RankedQuickUnionPathHalvingUF(WeightedQuickUnionPathHalvingUF):
+    """Link by rank instead of size: rank[root] is an upper bound on the
+    tree's height, and only grows when two equal ranks meet, so it fits
+    in a byte. sz is still kept, for size_of and largest
+    """
+    def __init__(self, n: int):
+        super().__init__(n)
+        self.rank = bytearray(n)
+
+    def union(self, n1, n2):
+        r1 = self._root(n1)
+        r2 = self._root(n2)
+        if r1 == r2:
+            return None
+        rank = self.rank
+        if rank[r1] < rank[r2]:
+            r1, r2 = r2, r1
+        elif rank[r1] == rank[r2]:
+            rank[r1] += 1
+        self.components[r2] = r1
+        self.sz[r1] += self.sz[r2]
+        self._merged(r1, r2, self.sz[r1])
+        return None
+
+
+class RollbackUF(WeightedQuickUnionUF):
+    """Union by size *without* path compression, so that every union
+    changes exactly one parent pointer and one size, and can be undone.
+    (Compression would rewrite pointers all over the tree on every find.)
+    snapshot() returns a token; rollback(token) undoes every union made
+    since, in O(1) per undone union
+    find: O(log_2(n)); union: O(log_2(n))
+    """
+    def __init__(self, n: int):
+        super().__init__(n)
+        self.history = []  # (child root, largest before) of each union
+
+    def union(self, n1, n2):
+        r1 = self._root(n1)
+        r2 = self._root(n2)
+        if r1 == r2:
+            return None
+        if self.sz[r1] < self.sz[r2]:
+            r1, r2 = r2, r1
+        self.history.append((r2, self._largest))
+        self.components[r2] = r1
+        self.sz[r1] += self.sz[r2]
+        self._merged(r1, r2, self.sz[r1])
+        return None
+
+    def snapshot(self):
+        return len(self.history)
+
+    def rollback(self, token):
+        while len(self.history) > token:
+            child, largest = self.history.pop()
+            parent = self.components[child]
+            self.sz[parent] -= self.sz[child]
+            self.components[child] = child
+            nxt = self.next
+            nxt[child], nxt[parent] = nxt[parent], nxt[child]  # unsplice
+            self._count += 1
+            self._largest = largest
+        return None
+
+
+class ConcurrentUF(_ComponentTracking):
+    """Weighted quick-union with path halving that many threads can
+    union and find on at once.
+
+    Only roots ever get a new parent, and linking a root takes the locks
+    of the two roots' stripes (stripes locks shared round-robin by the
+    indices, taken in stripe order so two unions can't deadlock).
+    Under the locks the union checks that both are still roots, then links
+    and moves the size: a compare-and-swap on the parent pointer, with the
+    stripe lock standing in for the hardware instruction.
+    Unions on unrelated trees take different locks and run side by side.
+
+    find never locks. Path halving only points a non-root at one of its
+    ancestors, and a non-root never becomes a root again, so racing
+    writes always leave a valid ancestor behind.
+    count() and largest() change under the stripe locks, just before the
+    link itself, so once find reports two items joined, count() already
+    reflects that union; each read is the value at some moment between
+    unions, never a torn one. The members splice happens under the
+    stripe locks along with the link; size_of and members are only exact
+    once the unions touching x have returned
+    """
+    def __init__(self, n: int, stripes: int = 64):
+        self.components = list(range(0, n))
+        self.sz = [1] * n
+        self._locks = [threading.Lock() for i in range(stripes)]
+        self._count_lock = threading.Lock()
+        self._track(n)
+
+    def size_of(self, x):
+        return self.sz[self._root(x)]
+
+    def find(self, n1, n2):
+        while True:
+            r1 = self._root(n1)
+            r2 = self._root(n2)
+            if r1 == r2:
+                return True
+            if self.components[r1] == r1:
+                # r1 was still n1's root when r2 was n2's: disjoint then
+                return False
+
+    def union(self, n1, n2):
+        while True:
+            r1 = self._root(n1)
+            r2 = self._root(n2)
+            if r1 == r2:
+                return None
+            if (self.sz[r1], r1) < (self.sz[r2], r2):
+                r1, r2 = r2, r1
+            if self._link(r2, r1):
+                return None
+
+    def _link(self, child, parent):
+        """Point root child at root parent, if both are still roots;
+        returns whether it did (False if either root has moved on)
+        """
+        stripes = len(self._locks)
+        first, second = sorted((child % stripes, parent % stripes))
+        with self._locks[first]:
+            with self._locks[second] if second != first else nullcontext():
+                components = self.components
+                if components[child] != child or components[parent] != parent:
+                    return False
+                size = self.sz[parent] + self.sz[child]
+                # count and largest change before the link is visible, so
+                # once find sees the two joined, count() has moved too
+                with self._count_lock:
+                    self._count -= 1
+                    if size > self._largest:
+                        self._largest = size
+                self.sz[parent] = size
+                nxt = self.next
+                nxt[child], nxt[parent] = nxt[parent], nxt[child]
+                components[child] = parent
+                return True
+
+    def _root(self, n):
+        components = self.components
+        parent = components[n]
+        while parent != n:
+            grandparent = components[parent]
+            components[n] = grandparent  # path halving
+            n = grandparent
+            parent = components[n]
+        return n
+
+
+class ArrayWeightedQuickUnionPathCompressionUF(_ComponentTracking):
+    """Weighted quick-union with path compression, but components and sz
+    live in numpy int arrays instead of lists: 4 bytes per entry (8 past
+    2 ** 31 elements) instead of a pointer to a boxed int.
+
+    Single pairs go through union/find as usual (compressing by halving,
+    so the root walk needs no temporary list); whole batches of pairs go
+    through union_many/connected_many, which work on index arrays.
+
+    union_many hooks roots in rounds, Shiloach-Vishkin style:
+    every pair whose roots differ links the (size, index)-smaller root
+    under the larger one, all at once. The order is strict, so a round can
+    never create a cycle. It can create long chains, though: one round of
+    (0, 1), (1, 2), ... (n - 2, n - 1) links a path n - 1 deep, so weighting
+    alone gives no depth bound here. What keeps the trees shallow is the
+    compression pass that ends every round: _roots walks the touched roots
+    up by pointer jumping (O(log depth) vectorized steps) and points each of
+    them straight at its new root, so after a round they are all one step
+    from the top.
+    A root with several candidate parents keeps one; the rest retry next round.
+    Each round then splices the members lists of every new component at
+    once: the old roots that now share a root form a group, and rotating
+    their next pointers by one place within the group joins their cycles.
+    """
+    def __init__(self, n: int):
+        dtype = np.int32 if n < 2 ** 31 else np.int64
+        self.components = np.arange(n, dtype=dtype)
+        self.sz = np.ones(n, dtype=dtype)
+        self._count = n
+        self._largest = 1 if n else 0
+        self.next = np.arange(n, dtype=dtype)
+
+    def size_of(self, x):
+        return int(self.sz[self._root(x)])
+
+    def members(self, x):
+        return (int(y) for y in super().members(x))
+
+    def find(self, n1, n2):
+        return self._root(n1) == self._root(n2)
+
+    def union(self, n1, n2):
+        r1 = self._root(n1)
+        r2 = self._root(n2)
+        if r1 == r2:
+            return None
+        elif self.sz[r1] < self.sz[r2]:
+            r1, r2 = r2, r1
+        self.components[r2] = r1
+        self.sz[r1] += self.sz[r2]
+        self._merged(r1, r2, int(self.sz[r1]))
+        return None
+
+    def connected_many(self, pairs):
+        """Boolean array: are pairs[i, 0] and pairs[i, 1] connected?"""
+        pairs = np.asarray(pairs).reshape(-1, 2)
+        return self._roots(pairs[:, 0]) == self._roots(pairs[:, 1])
+
+    def union_many(self, pairs):
+        """Union every pair in a (k, 2) index array"""
+        pairs = np.asarray(pairs).reshape(-1, 2)
+        a = pairs[:, 0]
+        b = pairs[:, 1]
+        components = self.components
+        sz = self.sz
+        while a.size:
+            r1 = self._roots(a)
+            r2 = self._roots(b)
+            live = r1 != r2
+            a, b, r1, r2 = a[live], b[live], r1[live], r2[live]
+            if not a.size:
+                break
+            s1 = sz[r1]
+            s2 = sz[r2]
+            swap = (s1 > s2) | ((s1 == s2) & (r1 > r2))
+            child = np.where(swap, r2, r1)
+            parent = np.where(swap, r1, r2)
+            components[child] = parent
+            # every touched index was a root at the start of the round;
+            # each new root absorbs the old sizes of the roots now below it
+            touched = np.sort(np.concatenate((child, parent)))
+            touched = touched[np.insert(touched[1:] != touched[:-1], 0, True)]
+            old_sz = sz[touched]
+            new_roots = self._roots(touched)
+            moved = new_roots != touched
+            np.add.at(sz, new_roots[moved], old_sz[moved])
+            self._count -= int(np.count_nonzero(moved))
+            self._largest = max(self._largest, int(sz[new_roots].max()))
+            self._splice(touched, new_roots)
+        return None
+
+    def _splice(self, old_roots, new_roots):
+        """Join the members cycles of old roots sharing a new root"""
+        order = np.argsort(new_roots, kind='stable')
+        xs = old_roots[order]
+        group = new_roots[order]
+        starts = np.flatnonzero(np.insert(group[1:] != group[:-1], 0, True))
+        # within each group, x takes the next pointer of the x after it,
+        # and the last x takes the first one's
+        following = np.arange(1, xs.size + 1)
+        ends = np.append(starts[1:], xs.size) - 1
+        following[ends] = starts
+        nxt = self.next
+        nxt[xs] = nxt[xs[following]]
+        return None
+
+    def _root(self, n):
+        components = self.components
+        while n != components[n]:
+            components[n] = components[components[n]]  # path halving
+            n = components[n]
+        return int(n)
+
+    def _roots(self, nodes):
+        """Vectorized _root: walk every node up at once, halving as we go,
+        then point each of the nodes straight at its root
+        """
+        components = self.components
+        roots = components[nodes]
+        todo = np.flatnonzero(components[roots] != roots)
+        while todo.size:
+            grandparents = components[components[roots[todo]]]
+            components[roots[todo]] = grandparents
+            roots[todo] = grandparents
+            todo = todo[components[grandparents] != grandparents]
+        components[nodes] = roots
+        return roots